@@ -1,17 +1,98 @@
-from file_manager import load_file
-from instructions import Instruction
+import time
+
+from block_engine import BlockEngine
+from control_flow import ControlFlowGraph, invalid_branches
+from execution import (CHANGE_BIND, CHANGE_MEMORY, CHANGE_PC, CHANGE_POP, CHANGE_PUSH, CHANGE_REGISTER,
+                       CHANGE_UNBIND, CHECK_INTERVAL, HALT_BREAKPOINT, HALT_END_OF_PROGRAM, HALT_ERROR, HALT_HLT,
+                       HALT_INSTRUCTION_LIMIT, HALT_TIME_LIMIT, HALT_WATCHPOINT, ExecutionResult, StateChange)
+from execution_trace import FLUSH_RECORDS, TraceWriter
+from instructions import Instruction, decode_word
+from machine_state import BinaryRegisterView, BinaryWordList, new_memory, new_registers, to_word
+from memory_allocator import MemoryAllocator
+from profiler import Profiler
+from program_format import MappedProgram, is_packed_file, read_program
+from snapshot import Snapshot
+from undo_log import UNDO_LOG_SIZE, UndoLog
 
 
 class Architecture:
     def __init__(self):
         # Initialize memory, stack, registers, and program counter
-        self.ptr_memory = {}
-        self.memory = 512 * ["000000000"]  # 512 the maximum size of our memory, due to the 9-bit pointer
+        # Words are stored as ints, see memory, stack and registers properties for the binary string views
+        # Variables are indexed both ways: name -> memory position and memory position -> name
+        # The instructions only refer to memory positions, binding_generation changes whenever a variable is
+        # added to or removed from a position
+        self.variable_positions = {}
+        self.position_variables = {}
+        self.allocator = MemoryAllocator()
+        self.binding_generation = 0
+        self.memory_words = new_memory()  # 512 the maximum size of our memory, due to the 9-bit pointer
         self.memory_code = []
-        self.stack = []
-        self.registers = {'t0': "000000000", 't1': "000000000", 't2': "000000000", 't3': "000000000"}
+        self.stack_words = []
+        self.register_words = new_registers()  # t0, t1, t2, t3
         self.program_counter = 0
         self.instruction = Instruction(self)
+        self.block_engine = None  # Created on the first execution with the block engine
+        self.control_flow = None  # ControlFlowGraph of the program, see control_flow_graph
+        self.profiler = None  # See enable_profiler
+        self.listeners = []  # Called with the state changes of every instruction executed in full or step mode
+        self.last_snapshot = None  # Snapshot taken or restored last, shares its unchanged memory pages with the next
+        self.undo_log = None  # See enable_undo_log
+        self.trace = None  # TraceWriter of the executed instructions, see start_trace
+
+    @property
+    def memory(self):
+        """
+        :return: Binary string view of the memory
+        """
+        return BinaryWordList(self.memory_words)
+
+    @memory.setter
+    def memory(self, values):
+        self.memory_words = new_memory()
+        for i, value in enumerate(values):
+            self.memory_words[i] = to_word(value)
+
+    @property
+    def ptr_memory(self):
+        """
+        :return: Pointer memory, name of each variable -> 9-bit pointer
+        """
+        return {name: bin(position)[2:].zfill(9) for name, position in self.variable_positions.items()}
+
+    @ptr_memory.setter
+    def ptr_memory(self, values):
+        self.variable_positions = {name: int(pointer, 2) for name, pointer in values.items()}
+        self.position_variables = {position: name for name, position in self.variable_positions.items()}
+        self.allocator = MemoryAllocator()
+        for position in self.position_variables:
+            self.allocator.claim(position)
+        self.binding_generation += 1
+
+    @property
+    def stack(self):
+        """
+        :return: Binary string view of the stack
+        """
+        return BinaryWordList(self.stack_words)
+
+    @stack.setter
+    def stack(self, values):
+        self.stack_words = [to_word(value) for value in values]
+
+    @property
+    def registers(self):
+        """
+        :return: Binary string view of the registers
+        """
+        return BinaryRegisterView(self.register_words)
+
+    @registers.setter
+    def registers(self, values):
+        self.register_words = new_registers()
+        view = BinaryRegisterView(self.register_words)
+        for name, value in values.items():
+            view[name] = value
 
     def __str__(self):
         """
@@ -19,163 +100,465 @@ class Architecture:
         """
         return f"Pointer Memory: {self.ptr_memory}\nMemory: {self.memory}\nMemory code: {self.memory_code}\nStack: {self.stack}\nRegisters: {self.registers}\nProgram Counter: {self.program_counter}\n"
 
-    def fetch_data(self, file_path):
+    def fetch_data(self, file_path, mapped=False):
         """
-        Load the file and split it into 32-bit chunks
+        Load the file (text or packed program) and decode its 32-bit instructions
+        A text file is streamed, each instruction goes straight from the file to the decoder
+        A branch past the end of the program is rejected (not checked for a memory-mapped program, whose instructions
+        are only decoded when executed)
         :param file_path: Path of the file to load
+        :param mapped: Execute a packed program from its memory-mapped file, decoding the instructions on first fetch
         """
-        try:
-            content = load_file(file_path)
-        except (FileNotFoundError, ValueError) as e:
-            raise ("Error: ", e)
-
-        # Split the content into 32-bit chunks
-        self.memory_code = [content[i:i + 32] for i in range(0, len(content), 32)]
-        self.memory_code = [self.sliced_instruction(chunk) for chunk in self.memory_code]
-        self.memory_code = [self.decode_instruction(instruction) for instruction in self.memory_code]
-
-    def sliced_instruction(self, instruction):
-        """
-        Slice the instruction into its different parts
-        :param instruction: Instruction to slice
-        :return: Dictionary containing the different parts of the instruction
-        """
-        op_code = instruction[0:5]
-        param_type_1 = instruction[5:7]
-        param_type_2 = instruction[7:9]
-        operand_1 = instruction[9:18]
-        operand_2 = instruction[18:27]
-        label = instruction[27:32]
-
-        sliced_instruction = {
-            'op_code': op_code,
-            'param_type_1': param_type_1,
-            'param_type_2': param_type_2,
-            'operand_1': operand_1,
-            'operand_2': operand_2,
-            'label': label
-        }
-
-        return sliced_instruction
+        self.close_program()
+        if mapped and is_packed_file(file_path):
+            self.memory_code = MappedProgram(file_path)
+        else:
+            memory_code = [decode_word(word) for word in read_program(file_path)]
+            for program_counter, target in invalid_branches(memory_code):
+                raise ValueError(f"Invalid branch: instruction {program_counter} jumps to {target}, past the end of "
+                                 f"the program ({len(memory_code)} instructions)")
+            self.memory_code = memory_code
+
+    def control_flow_graph(self):
+        """
+        :return: ControlFlowGraph of the loaded program, built on the first call
+        """
+        if self.control_flow is None or self.control_flow.memory_code is not self.memory_code:
+            self.control_flow = ControlFlowGraph(self.memory_code)
+        return self.control_flow
+
+    def close_program(self):
+        """
+        Release the memory map of a program loaded with fetch_data(..., mapped=True)
+        """
+        if isinstance(self.memory_code, MappedProgram):
+            self.memory_code.close()
+        self.memory_code = []
 
     def decode_instruction(self, instruction):
         """
-        Decode the instruction
-        :param instruction: Instruction to decode
-        :return: Dictionary containing the decoded instruction
+        Decode the instruction, resolving its operands (register index, constant, memory position, label)
+        :param instruction: 32-bit instruction to decode (binary string)
+        :return: DecodedInstruction
         """
-        try:
-            instruction['op_code'] = self.instruction.decode_op_code(instruction['op_code'])
-            instruction['param_type_1'] = self.instruction.decode_param_type(instruction['param_type_1'])
-            instruction['param_type_2'] = self.instruction.decode_param_type(instruction['param_type_2'])
-        except ValueError as e:
-            raise ("Error: ", e)
-        return instruction
+        return decode_word(int(instruction, 2))
 
-    def execute_program(self, mode):
+    def execute_program(self, mode, engine="interpreter", max_instructions=None, time_limit=None, breakpoints=None):
         """
         Execute the program
-        :param mode: Mode of execution (full or step)
-        :return: Result of the execution if HLT, VAD or VDE is encountered
+        :param mode: Mode of execution (full, step or quiet)
+        :param engine: Engine of the quiet mode: interpreter (one instruction at a time) or block (translated basic
+        blocks, see block_engine.py)
+        :param max_instructions: Maximum number of instructions to execute (full and quiet modes), None for no limit
+        :param time_limit: Maximum execution time in seconds (full and quiet modes), None for no limit
+        :param breakpoints: Breakpoints and watchpoints stopping the quiet mode (see breakpoints.py), None for none
+        :return: Result of the execution if HLT, VAD or VDE is encountered or a limit is reached, ExecutionResult in
+        quiet mode
         """
         if mode == "full":
-            return self.execute_full_program()
+            return self.execute_full_program(max_instructions, time_limit)
         elif mode == "step":
             return self.execute_step_program()
+        elif mode == "quiet":
+            return self.execute_quiet_program(engine, max_instructions, time_limit, breakpoints)
 
     def execute_step_program(self):
         """
         Execute the program step by step
         :return: Result of the execution if HLT, VAD or VDE is encountered
         """
-        result = self.execute_instruction(self.memory_code[self.program_counter])
+        instruction = self.memory_code[self.program_counter]
+        result = self.execute_instruction(instruction)
         print(result)
-        if result == "HLT":
+        if instruction.op_code == "HLT":
             return "END"
-        elif "VAD" in result:
+        elif instruction.op_code == "VAD":
             return "VAD"
-        elif "VDE" in result:
+        elif instruction.op_code == "VDE":
             return "VDE"
 
     def clear_memory(self):
         """
         Clear the memory, memory_code, ptr_memory, stack, register, registers, and program counter
         """
-        self.memory = 512 * ["000000000"]
-        self.memory_code = []
-        self.ptr_memory = {}
-        self.stack = []
-        self.registers = {'t0': "000000000", 't1': "000000000", 't2': "000000000", 't3': "000000000"}
+        self.memory_words = new_memory()
+        self.close_program()
+        self.variable_positions = {}
+        self.position_variables = {}
+        self.allocator = MemoryAllocator()
+        self.binding_generation += 1
+        self.stack_words = []
+        self.register_words = new_registers()
         self.program_counter = 0
         self.instruction = Instruction(self)
+        self.block_engine = None
+        self.last_snapshot = None
+        if self.undo_log is not None:
+            self.undo_log.clear()
+        if self.profiler is not None:
+            self.profiler.attach(self.instruction)
 
-    def execute_full_program(self):
+    def execute_full_program(self, max_instructions=None, time_limit=None):
         """
         Execute the program entirely
-        :return: Result of the execution if HLT is encountered
+        :param max_instructions: Maximum number of instructions to execute, None for no limit
+        :param time_limit: Maximum execution time in seconds, None for no limit
+        :return: Result of the execution if HLT is encountered or the halt reason if a limit is reached
         """
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        count = 0
         while self.program_counter < len(self.memory_code):
-            result = self.execute_instruction(self.memory_code[self.program_counter])
-            if result == "HLT":
+            if max_instructions is not None and count >= max_instructions:
+                return HALT_INSTRUCTION_LIMIT
+            if deadline is not None and time.perf_counter() >= deadline:
+                return HALT_TIME_LIMIT
+            instruction = self.memory_code[self.program_counter]
+            self.execute_instruction(instruction)
+            count += 1
+            if instruction.op_code == "HLT":
                 return "END"
 
+    def execute_quiet_program(self, engine="interpreter", max_instructions=None, time_limit=None, breakpoints=None):
+        """
+        Execute the program entirely without any output
+        Errors raised by the instructions stop the execution and are reported in the result
+        The limits are checked between chunks of instructions, the loop without limit does not check anything
+        With breakpoints, the program counter is looked up in the breakpoints before every instruction and the
+        watchpoints (if any) are checked after it, the reached one is described by breakpoints.hit
+        With the undo log enabled or a trace started, the changes of every instruction are recorded (see
+        enable_undo_log and start_trace)
+        :param engine: interpreter or block
+        :param max_instructions: Maximum number of instructions to execute, None for no limit
+        :param time_limit: Maximum execution time in seconds, None for no limit
+        :param breakpoints: Breakpoints object (interpreter only), None for no breakpoint
+        :return: ExecutionResult
+        """
+        if engine == "block":
+            if self.profiler is not None:
+                raise ValueError("The block engine can not be profiled, use the interpreter")
+            if breakpoints is not None:
+                raise ValueError("The block engine does not support breakpoints, use the interpreter")
+            if self.undo_log is not None:
+                raise ValueError("The block engine does not record the undo log, use the interpreter")
+            if self.trace is not None:
+                raise ValueError("The block engine does not record traces, use the interpreter")
+            if self.block_engine is None:
+                self.block_engine = BlockEngine(self)
+            return self.block_engine.execute(max_instructions, time_limit)
+        elif engine != "interpreter":
+            raise ValueError(f"Unknown engine: {engine}")
+
+        memory_code = self.memory_code
+        end = len(memory_code)
+        execute = self.instruction.execute_instruction
+        count = 0
+        instruction = None
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        undo_log = self.undo_log
+        trace = self.trace
+        recording = undo_log is not None or trace is not None
+        checked = breakpoints is not None or recording
+        skip, stops, anywhere, watching = None, (), False, False
+        if breakpoints is not None:
+            skip = breakpoints.start(self)
+            stops = breakpoints.program_counters
+            anywhere = None in breakpoints.conditions
+            watching = breakpoints.watching()
+        try:
+            if max_instructions is None and deadline is None and not checked:
+                while self.program_counter < end:
+                    instruction = memory_code[self.program_counter]
+                    execute(instruction)
+                    self.program_counter += 1
+                    count += 1
+            while self.program_counter < end:
+                chunk = CHECK_INTERVAL
+                if max_instructions is not None:
+                    if count >= max_instructions:
+                        return ExecutionResult(self, HALT_INSTRUCTION_LIMIT, count)
+                    chunk = min(chunk, max_instructions - count)
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return ExecutionResult(self, HALT_TIME_LIMIT, count)
+                if not checked:
+                    for _ in range(chunk):
+                        if self.program_counter >= end:
+                            break
+                        instruction = memory_code[self.program_counter]
+                        execute(instruction)
+                        self.program_counter += 1
+                        count += 1
+                    continue
+                for _ in range(chunk):
+                    program_counter = self.program_counter
+                    if program_counter >= end:
+                        break
+                    if (program_counter in stops or anywhere) and program_counter != skip \
+                            and breakpoints.check_before(self, program_counter):
+                        return ExecutionResult(self, HALT_BREAKPOINT, count)
+                    skip = None
+                    instruction = memory_code[program_counter]
+                    if not recording:
+                        execute(instruction)
+                        self.program_counter += 1
+                    else:
+                        changes = self.execute_recorded(instruction)
+                        self.program_counter += 1
+                        changes.append(StateChange(CHANGE_PC, None, program_counter, self.program_counter))
+                        if undo_log is not None:
+                            undo_log.record(changes)
+                        if trace is not None:
+                            trace.record(self, program_counter, instruction, changes)
+                    count += 1
+                    if watching and breakpoints.check_after(self):
+                        return ExecutionResult(self, HALT_WATCHPOINT, count)
+        except (ValueError, OverflowError, ZeroDivisionError) as e:
+            return ExecutionResult(self, HALT_ERROR, count, f"{type(e).__name__}: {e}")
+
+        if instruction is not None and instruction.op_code == "HLT":
+            return ExecutionResult(self, HALT_HLT, count)
+        return ExecutionResult(self, HALT_END_OF_PROGRAM, count)
+
     def execute_instruction(self, instruction):
         """
         Send the instruction to the instruction class to be executed
         Increment the program counter
+        The listeners receive the changes made by the instruction, the undo log and the trace (if any) record them
         :param instruction: Instruction to execute
-        :return: Result of the execution
+        :return: Result of the execution (the executed instruction in a human-readable format)
         """
-        result = self.instruction.execute_instruction(instruction)
+        observed = self.listeners or self.undo_log is not None or self.trace is not None
+        if observed:
+            program_counter = self.program_counter
+            changes = self.execute_observed(instruction)
+        else:
+            self.instruction.execute_instruction(instruction)
+        result = self.instruction.disassemble(instruction)
         print(f"Result = {result}")
         print(self)
         self.program_counter += 1
+        if observed:
+            changes.append(StateChange(CHANGE_PC, None, program_counter, self.program_counter))
+            if self.undo_log is not None:
+                self.undo_log.record(changes)
+            if self.trace is not None:
+                self.trace.record(self, program_counter, instruction, changes)
+            for listener in self.listeners:
+                listener(changes)
         return result
 
+    def execute_observed(self, instruction):
+        """
+        Execute the instruction and find the changes it made to the state
+        An instruction pushes or pops at most one value, so the stack is compared by its size and its top
+        :param instruction: Instruction to execute
+        :return: List of StateChange (bindings, registers, memory, stack)
+        """
+        registers = list(self.register_words)
+        memory = self.memory_words[:]
+        position_variables = dict(self.position_variables)
+        stack = self.stack_words
+        stack_size = len(stack)
+        top = stack[-1] if stack else None
+
+        self.instruction.execute_instruction(instruction)
+
+        changes = []
+        if position_variables != self.position_variables:
+            for position, variable_name in position_variables.items():
+                if self.position_variables.get(position) != variable_name:
+                    changes.append(StateChange(CHANGE_UNBIND, position, variable_name, None))
+            for position, variable_name in self.position_variables.items():
+                if position_variables.get(position) != variable_name:
+                    changes.append(StateChange(CHANGE_BIND, position, None, variable_name))
+        for index, (old, new) in enumerate(zip(registers, self.register_words)):
+            if old != new:
+                changes.append(StateChange(CHANGE_REGISTER, index, old, new))
+        if memory != self.memory_words:
+            for position, (old, new) in enumerate(zip(memory, self.memory_words)):
+                if old != new:
+                    changes.append(StateChange(CHANGE_MEMORY, position, old, new))
+        if len(stack) > stack_size:
+            changes.append(StateChange(CHANGE_PUSH, stack_size, None, stack[-1]))
+        elif len(stack) < stack_size:
+            changes.append(StateChange(CHANGE_POP, stack_size - 1, top, None))
+        return changes
+
+    def execute_recorded(self, instruction):
+        """
+        Execute the instruction and find the changes it made to the state, like execute_observed without copying the
+        memory: only STR writes to the memory (at its first operand) and only VAD and VDE change the variables
+        :param instruction: Instruction to execute
+        :return: List of StateChange (registers, memory, stack)
+        """
+        if instruction.op_code == "VAD" or instruction.op_code == "VDE":
+            return self.execute_observed(instruction)
+        registers = self.register_words
+        old_registers = registers[:]
+        position = instruction.operand_1 if instruction.param_type_1 == "memory" else None
+        word = None if position is None else self.memory_words[position]
+        stack = self.stack_words
+        stack_size = len(stack)
+        top = stack[-1] if stack else None
+
+        self.instruction.execute_instruction(instruction)
+
+        changes = []
+        if old_registers != registers:
+            for index, (old, new) in enumerate(zip(old_registers, registers)):
+                if old != new:
+                    changes.append(StateChange(CHANGE_REGISTER, index, old, new))
+        if position is not None and self.memory_words[position] != word:
+            changes.append(StateChange(CHANGE_MEMORY, position, word, self.memory_words[position]))
+        if len(stack) > stack_size:
+            changes.append(StateChange(CHANGE_PUSH, stack_size, None, stack[-1]))
+        elif len(stack) < stack_size:
+            changes.append(StateChange(CHANGE_POP, stack_size - 1, top, None))
+        return changes
+
+    def add_listener(self, listener):
+        """
+        :param listener: Function called with the list of StateChange of every instruction executed in full or step
+        mode (the quiet mode does not report changes)
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        :param listener: Listener to remove
+        """
+        self.listeners.remove(listener)
+
+    def enable_profiler(self):
+        """
+        Count the executed instructions per op code and program counter, their time and the branches taken
+        The counters are kept across programs until the profiler is reset
+        :return: Profiler
+        """
+        if self.profiler is None:
+            self.profiler = Profiler()
+            self.profiler.attach(self.instruction)
+        return self.profiler
+
+    def disable_profiler(self):
+        """
+        Stop profiling, the execution goes back to the unmeasured path
+        :return: Profiler with the counters collected so far, None if it was not enabled
+        """
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.detach()
+            self.profiler = None
+        return profiler
+
+    def enable_undo_log(self, size=UNDO_LOG_SIZE):
+        """
+        Record the changes of every executed instruction (interpreter only) so they can be undone with step_back
+        :param size: Number of instructions kept, the oldest are dropped
+        :return: UndoLog
+        """
+        if self.undo_log is None or self.undo_log.size != size:
+            self.undo_log = UndoLog(size)
+        return self.undo_log
+
+    def disable_undo_log(self):
+        """
+        Stop recording and drop the recorded changes
+        """
+        self.undo_log = None
+
+    def step_back(self):
+        """
+        Undo the last executed instruction, the listeners receive the changes made by undoing it
+        :return: True if an instruction was undone, False if the undo log is empty
+        """
+        if self.undo_log is None:
+            raise ValueError("The undo log is not enabled")
+        changes = self.undo_log.undo(self)
+        if changes is None:
+            return False
+        for listener in self.listeners:
+            listener(changes)
+        return True
+
+    def start_trace(self, file_path, flush_records=FLUSH_RECORDS):
+        """
+        Write a binary record of every instruction executed by the interpreter (see execution_trace.py)
+        :param file_path: Trace file to write
+        :param flush_records: Number of records buffered between two writes to the file
+        :return: TraceWriter
+        """
+        self.stop_trace()
+        self.trace = TraceWriter(file_path, flush_records)
+        return self.trace
+
+    def stop_trace(self):
+        """
+        Write the buffered records and close the trace file
+        """
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+    def take_snapshot(self):
+        """
+        Save the registers, memory, variables, stack and program counter (see snapshot.py)
+        The memory pages unchanged since the last snapshot are shared with it
+        :return: Snapshot
+        """
+        self.last_snapshot = Snapshot(self, self.last_snapshot)
+        return self.last_snapshot
+
+    def restore_snapshot(self, snapshot):
+        """
+        Go back to the state of a snapshot taken on the same program, only the memory pages which changed are copied
+        The undo log is cleared
+        :param snapshot: Snapshot returned by take_snapshot
+        """
+        snapshot.restore(self)
+        self.last_snapshot = snapshot
+        if self.undo_log is not None:
+            self.undo_log.clear()
+
     def add_to_memory(self, variable_name, value):
         """
         Add a variable to the simulated memory
         Can add up to 512 variables (9-bit pointer)
-        Search for the first available space in memory and add the variable there
+        The variable is added at the lowest free position of the memory
         :param variable_name: Name of the variable to add
         :param value: Value of the variable to add
         :return: True if the variable was successfully added, False otherwise
         """
         # Check if variable_name is already in memory
-        if variable_name in self.ptr_memory:
-            self.memory[int(self.ptr_memory[variable_name], 2)] = value
+        if variable_name in self.variable_positions:
+            self.memory_words[self.variable_positions[variable_name]] = to_word(value)
             return True
 
-        liste_ptr_memory = list(self.ptr_memory.values())
-        liste_ptr_memory = [int(i, 2) for i in liste_ptr_memory]
-
-        for i in range(0, 512):
-            if i in liste_ptr_memory:
-                pass
-            else:
-                self.ptr_memory[variable_name] = bin(i)[2:].zfill(9)
-                if value:
-                    self.memory[i] = value
-                return True  # Success
+        position = self.allocator.allocate()
+        if position is None:
+            return False  # No space in memory found
 
-        return False  # No space in memory found
+        self.variable_positions[variable_name] = position
+        self.position_variables[position] = variable_name
+        self.binding_generation += 1
+        if value:
+            self.memory_words[position] = to_word(value)
+        return True  # Success
 
     def remove_from_memory(self, variable_name):
         """
         Remove a variable from the simulated memory
         Check if the pointer is in memory pointer, if yes remove it with associated value stored in memory
+        The instructions refer to the memory position, not to the name, so they are left untouched:
+        removing a variable does not depend on the size of the program
         :param variable_name: Name of the variable to remove
         :return: True if the variable was successfully removed, False otherwise
         """
         # Check if variable_name is already in memory
-        if variable_name in self.ptr_memory:
-            # Check if other instruction uses the same variable name, if yes replace it with memory address
-            for instruction in self.memory_code:
-                if instruction['param_type_1'] == 'memory' and instruction['operand_1'] == variable_name:
-                    instruction['operand_1'] = self.ptr_memory[variable_name]
-                if instruction['param_type_2'] == 'memory' and instruction['operand_2'] == variable_name:
-                    instruction['operand_2'] = self.ptr_memory[variable_name]
-            self.memory[int(self.ptr_memory[variable_name], 2)] = "0000000000"
-            del self.ptr_memory[variable_name]
+        if variable_name in self.variable_positions:
+            position = self.variable_positions.pop(variable_name)
+            del self.position_variables[position]
+            self.allocator.release(position)
+            self.binding_generation += 1
+            self.memory_words[position] = 0
             return True  # Success
         return False  # Not found
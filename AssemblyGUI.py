@@ -1,6 +1,17 @@
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from Assembly import Architecture
+from breakpoints import Breakpoints
+from disassembly_cache import DisassemblyCache
+from execution import (CHANGE_BIND, CHANGE_MEMORY, CHANGE_PC, CHANGE_POP, CHANGE_PUSH, CHANGE_REGISTER, CHANGE_UNBIND,
+                       HALT_BREAKPOINT, HALT_WATCHPOINT)
+from machine_state import REGISTER_NAMES
+from program_format import EXTENSION
+from simulation_worker import DONE, PAUSED, SimulationWorker
+
+PROGRESS_INTERVAL = 100  # Milliseconds between two updates of the progress of a simulation
+
 
 class AssemblySimulatorUI:
     def __init__(self, master):
@@ -11,6 +22,17 @@ class AssemblySimulatorUI:
         self.master = master
         self.master.title("Assembly Simulator")
         self.architecture = Architecture()
+        self.architecture.add_listener(self.apply_changes)
+        self.architecture.enable_undo_log()  # Step Back over the steps, and over Simulate if Record Simulate is checked
+        self.disassembly = DisassemblyCache(self.architecture)
+        self.code_generation = None  # Binding generation of the code display
+        self.variable_rows = []  # Memory positions of the variables, in the order of the variables display
+        self.memory_lines = {}  # Memory position -> code lines of the instructions with this memory operand
+        self.worker = None  # SimulationWorker of the running simulation
+        self.progress = (0, 0.0)  # Instruction count and time of the last progress update
+        self.paused_shown = False  # State of the paused simulation already shown
+        self.breakpoints = Breakpoints()  # Rebuilt from breakpoint_lines and the breakpoints entry on Simulate
+        self.breakpoint_lines = set()  # Code lines with a breakpoint (double click on a line)
 
         # File Info Frame
         file_info_frame = tk.LabelFrame(master, text="File Info", padx=5, pady=5)
@@ -24,8 +46,15 @@ class AssemblySimulatorUI:
         self.code_text = tk.Text(file_info_frame, height=10)
         self.code_text.pack(fill="both", expand=True)
         self.code_text.tag_configure('highlight', background='grey')
+        self.code_text.tag_configure('breakpoint', background='red')
+        self.code_text.tag_raise('highlight')
+        self.code_text.bind('<Double-Button-1>', self.toggle_breakpoint)
         self.code_text.config(state=tk.DISABLED)
 
+        tk.Label(file_info_frame, text="Breakpoints (12 if t0 == 5, if abc == 3, watch abc, stack 4)").pack()
+        self.breakpoints_entry = tk.Entry(file_info_frame)
+        self.breakpoints_entry.pack(fill="x", expand=True)
+
         tk.Label(file_info_frame, text="Next Instruction").pack()
         self.next_instruction_entry = tk.Entry(file_info_frame, state='readonly')
         self.next_instruction_entry.pack(fill="x", expand=True)
@@ -37,14 +66,14 @@ class AssemblySimulatorUI:
         tk.Label(memory_info_frame, text="Variables").pack()
         self.variables_text = tk.Text(memory_info_frame, height=5)
         self.variables_text.pack(fill="x", expand=True)
-        for variable in self.architecture.ptr_memory:
-            self.variables_text.insert(tk.END, f"{variable}: {int(self.architecture.memory[int(self.architecture.ptr_memory[variable], 2)], 2)}\n")
+        for variable, position in self.architecture.variable_positions.items():
+            self.variables_text.insert(tk.END, f"{variable}: {self.architecture.memory_words[position]}\n")
 
         tk.Label(memory_info_frame, text="Stack").pack()
         self.stack_text = tk.Text(memory_info_frame, height=5)
         self.stack_text.pack(fill="x", expand=True)
-        for value in reversed(self.architecture.stack):
-            self.stack_text.insert(tk.END, f"{int(value, 2)}\n")
+        for value in reversed(self.architecture.stack_words):
+            self.stack_text.insert(tk.END, f"{value}\n")
 
         # Registers Frame
         registers_frame = tk.LabelFrame(master, text="Registers", padx=5, pady=5)
@@ -52,8 +81,8 @@ class AssemblySimulatorUI:
 
         self.registers_text = tk.Text(registers_frame, height=5)
         self.registers_text.pack(fill="both", expand=True)
-        for register in self.architecture.registers:
-            self.registers_text.insert(tk.END, f"{register}: {int(self.architecture.registers[register], 2)}\n")
+        for register, value in zip(REGISTER_NAMES, self.architecture.register_words):
+            self.registers_text.insert(tk.END, f"{register}: {value}\n")
         self.registers_text.insert(tk.END, f"PC: {self.architecture.program_counter}\n")
         self.registers_text.config(state=tk.DISABLED)
 
@@ -67,8 +96,23 @@ class AssemblySimulatorUI:
         self.simulate_button.pack(side="left", padx=5)
         self.step_button = tk.Button(buttons_frame, text="Step Simulation", command=self.step_simulation)
         self.step_button.pack(side="left", padx=5)
+        self.step_back_button = tk.Button(buttons_frame, text="Step Back", command=self.step_back_simulation)
+        self.step_back_button.pack(side="left", padx=5)
+        self.record_simulate = tk.BooleanVar(master, value=False)
+        tk.Checkbutton(buttons_frame, text="Record Simulate", variable=self.record_simulate).pack(side="left", padx=5)
+        self.pause_button = tk.Button(buttons_frame, text="Pause", command=self.pause_simulation)
+        self.pause_button.pack(side="left", padx=5)
+        self.stop_button = tk.Button(buttons_frame, text="Stop", command=self.stop_simulation)
+        self.stop_button.pack(side="left", padx=5)
+        self.speed_label = tk.Label(buttons_frame, text="Instructions/s: -")
+        self.speed_label.pack(side="left", padx=5)
+        self.stop_reason_label = tk.Label(buttons_frame, text="")
+        self.stop_reason_label.pack(side="left", padx=5)
         self.simulate_button.config(state='disabled')
         self.step_button.config(state='disabled')
+        self.step_back_button.config(state='disabled')
+        self.pause_button.config(state='disabled')
+        self.stop_button.config(state='disabled')
 
     def load_file(self):
         """
@@ -76,12 +120,16 @@ class AssemblySimulatorUI:
         Update all the displays
         """
         self.architecture.clear_memory()
-        file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        self.disassembly.clear()
+        self.breakpoints = Breakpoints()
+        self.breakpoint_lines = set()
+        self.code_text.tag_remove('breakpoint', '1.0', tk.END)
+        self.stop_reason_label.config(text="")
+        file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("Packed programs", "*" + EXTENSION),
+                                                          ("Assembly sources", "*.asm"), ("All files", "*.*")])
         if file_path:
             try:
-                with open(file_path, 'r') as file:
-                    content = file.read()
-                    self.architecture.fetch_data(file_path)
+                self.architecture.fetch_data(file_path)
                 self.file_name_entry.delete(0, tk.END)
                 self.file_name_entry.insert(0, file_path)
                 self.file_name_entry.config(state='readonly')
@@ -91,15 +139,22 @@ class AssemblySimulatorUI:
                 self.code_text.delete('1.0', tk.END)
                 # To update the content
 
-                for instruction in self.architecture.memory_code:
+                self.memory_lines = {}
+                for line, instruction in enumerate(self.architecture.memory_code, 1):
                     print(instruction)
-                    self.code_text.insert('999.0', self.translate(instruction))
+                    self.code_text.insert('999.0', self.translate(line - 1))
+                    # The disassembly shows the variable name of a memory operand
+                    for param_type, position in ((instruction.param_type_1, instruction.operand_1),
+                                                 (instruction.param_type_2, instruction.operand_2)):
+                        if param_type == "memory":
+                            self.memory_lines.setdefault(position, []).append(line)
 
                 self.code_text.config(state=tk.DISABLED)  # Disable the text widget after inserting
+                self.code_generation = self.architecture.binding_generation
                 self.simulate_button.config(state='normal')
                 self.step_button.config(state='normal')
 
-                next_instruction = self.translate(self.architecture.memory_code[self.architecture.program_counter])
+                next_instruction = self.translate(self.architecture.program_counter)
 
                 self.next_instruction_entry.config(state=tk.NORMAL)  # Allow writing
                 self.next_instruction_entry.delete(0, tk.END)
@@ -113,75 +168,13 @@ class AssemblySimulatorUI:
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load file: {e}")
 
-    def translate(self, instruction):
+    def translate(self, program_counter):
         """
-        Translate the instruction into a human-readable format
-        :param instruction: Instruction to translate
+        Translate the instruction into a human-readable format (cached until VAD or VDE change the variables)
+        :param program_counter: Program counter of the instruction to translate
         :return: String containing the translated instruction
         """
-        if instruction['param_type_1'] == "memory":
-            instruction = self.give_address_memory(instruction, 1)
-        elif instruction['param_type_1'] == "register":
-            instruction = self.give_address_register(instruction, 1)
-
-        if instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-        elif instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-
-        match instruction['op_code']:
-            case "LDA":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + "\n"
-            case "STR":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + "\n"
-            case "PUSH":
-                return instruction['op_code'] + " " + instruction['operand_1'] + "\n"
-            case "AND":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + "\n"
-            case "OR":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + "\n"
-            case "ADD":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + "\n"
-            case "SUB":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + "\n"
-            case "DIV":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + "\n"
-            case "MUL":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + "\n"
-            case "MOD":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + "\n"
-            case "INC":
-                return instruction['op_code'] + " " + instruction['operand_1'] + "\n"
-            case "DEC":
-                return instruction['op_code'] + " " + instruction['operand_1'] + "\n"
-            case "BEQ":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + " " + instruction['label'] + "\n"
-            case "BNE":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + " " + instruction['label'] + "\n"
-            case "BBG":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + " " + instruction['label'] + "\n"
-            case "BSM":
-                return instruction['op_code'] + " " + instruction['operand_1'] + " " + instruction['operand_2'] + " " + instruction['label'] + "\n"
-            case "JMP":
-                return instruction['op_code'] + " " + instruction['label'] + "\n"
-            case "HLT":
-                return instruction['op_code'] + "\n"
-            case "POP":
-                return instruction['op_code'] + " " + instruction['operand_1'] + "\n"
-            case "NOT":
-                return instruction['op_code'] + " " + instruction['operand_1'] + "\n"
-            case "VAD":
-                string = instruction['operand_1'][2:] + instruction['operand_2'] + instruction['label']
-                string = chr(int("0b0" + string[0:7], 2)) + chr(int("0b0" + string[7:14], 2)) + chr(
-                    int("0b0" + string[14:21], 2))
-                return instruction['op_code'] + " " + string + "\n"
-            case "VDE":
-                string = instruction['operand_1'][2:] + instruction['operand_2'] + instruction['label']
-                string = chr(int("0b0" + string[0:7], 2)) + chr(int("0b0" + string[7:14], 2)) + chr(
-                    int("0b0" + string[14:21], 2))
-                return instruction['op_code'] + " " + string + "\n"
-            case _: raise ValueError("Invalid op code")
-
+        return self.disassembly.get(program_counter) + "\n"
 
     def update_registers_display(self):
         """
@@ -192,8 +185,8 @@ class AssemblySimulatorUI:
         self.registers_text.delete('1.0', tk.END)
 
         # Insert the updated register values
-        for register in self.architecture.registers:
-            self.registers_text.insert(tk.END, f"{register}: {int(self.architecture.registers[register], 2)}\n")
+        for register, value in zip(REGISTER_NAMES, self.architecture.register_words):
+            self.registers_text.insert(tk.END, f"{register}: {value}\n")
         self.registers_text.insert(tk.END, f"PC: {self.architecture.program_counter}\n")
 
         self.registers_text.config(state=tk.DISABLED)  # Disable text widget to prevent editing
@@ -204,9 +197,10 @@ class AssemblySimulatorUI:
         """
         self.variables_text.config(state=tk.NORMAL)  # Enable text widget for editing
         self.variables_text.delete('1.0', tk.END)
-        for variable in self.architecture.ptr_memory:
-            self.variables_text.insert(tk.END, f"{variable}: {int(self.architecture.memory[int(self.architecture.ptr_memory[variable], 2)], 2)}\n")
+        for variable, position in self.architecture.variable_positions.items():
+            self.variables_text.insert(tk.END, f"{variable}: {self.architecture.memory_words[position]}\n")
         self.variables_text.config(state=tk.DISABLED)  # Disable text widget to prevent editing
+        self.variable_rows = list(self.architecture.variable_positions.values())
 
     def update_stack_display(self):
         """
@@ -215,10 +209,86 @@ class AssemblySimulatorUI:
         self.stack_text.config(state=tk.NORMAL)  # Enable text widget for editing
         self.stack_text.delete('1.0', tk.END)
         # Insert the updated stack values in reversed order
-        for value in reversed(self.architecture.stack):
-            self.stack_text.insert(tk.END, f"{int(value, 2)}\n")
+        for value in reversed(self.architecture.stack_words):
+            self.stack_text.insert(tk.END, f"{value}\n")
         self.stack_text.config(state=tk.DISABLED)  # Disable text widget to prevent editing
 
+    @staticmethod
+    def set_row(text, row, content):
+        """
+        Replace a row of a display
+        :param text: Text widget
+        :param row: Row to replace (1 is the first row)
+        :param content: New content of the row
+        """
+        text.config(state=tk.NORMAL)
+        text.delete(f"{row}.0", f"{row}.end")
+        text.insert(f"{row}.0", content)
+        text.config(state=tk.DISABLED)
+
+    @staticmethod
+    def insert_row(text, row, content):
+        """
+        Insert a row in a display
+        :param text: Text widget
+        :param row: Row of the new row (1 is the first row)
+        :param content: Content of the row
+        """
+        text.config(state=tk.NORMAL)
+        text.insert(f"{row}.0", content + "\n")
+        text.config(state=tk.DISABLED)
+
+    @staticmethod
+    def delete_row(text, row):
+        """
+        Delete a row of a display
+        :param text: Text widget
+        :param row: Row to delete (1 is the first row)
+        """
+        text.config(state=tk.NORMAL)
+        text.delete(f"{row}.0", f"{row + 1}.0")
+        text.config(state=tk.DISABLED)
+
+    def apply_changes(self, changes):
+        """
+        Listener of the architecture: update only the rows changed by the executed instruction
+        :param changes: List of StateChange
+        """
+        architecture = self.architecture
+        for change in changes:
+            if change.kind == CHANGE_REGISTER:
+                self.set_row(self.registers_text, change.location + 1, f"{REGISTER_NAMES[change.location]}: {change.new}")
+            elif change.kind == CHANGE_PC:
+                self.set_row(self.registers_text, len(REGISTER_NAMES) + 1, f"PC: {change.new}")
+            elif change.kind == CHANGE_PUSH:
+                self.insert_row(self.stack_text, 1, f"{change.new}")  # Top of the stack first
+            elif change.kind == CHANGE_POP:
+                self.delete_row(self.stack_text, 1)
+            elif change.kind == CHANGE_BIND:
+                self.variable_rows.append(change.location)
+                self.insert_row(self.variables_text, len(self.variable_rows),
+                                f"{change.new}: {architecture.memory_words[change.location]}")
+                self.update_code_lines(change.location)
+            elif change.kind == CHANGE_UNBIND:
+                row = self.variable_rows.index(change.location)
+                del self.variable_rows[row]
+                self.delete_row(self.variables_text, row + 1)
+                self.update_code_lines(change.location)
+            elif change.kind == CHANGE_MEMORY and change.location in self.variable_rows:
+                variable_name = architecture.position_variables[change.location]
+                self.set_row(self.variables_text, self.variable_rows.index(change.location) + 1,
+                             f"{variable_name}: {change.new}")
+
+    def update_code_lines(self, position):
+        """
+        Translate again the instructions using a memory position whose variable changed
+        :param position: Memory position
+        """
+        for line in self.memory_lines.get(position, []):
+            self.set_row(self.code_text, line, self.translate(line - 1).rstrip("\n"))
+            if line in self.breakpoint_lines:
+                self.code_text.tag_add('breakpoint', f"{line}.0", f"{line}.end")
+
     def clear_highlight(self):
         """
         Clear the highlight from the code display
@@ -232,21 +302,152 @@ class AssemblySimulatorUI:
         """
         self.code_text.tag_add('highlight', f"{line_number}.0", f"{line_number}.end")
 
+    def toggle_breakpoint(self, event):
+        """
+        Add or remove the breakpoint of the double-clicked code line
+        :param event: Tkinter event
+        """
+        line = int(self.code_text.index(f"@{event.x},{event.y}").split('.')[0])
+        if line > len(self.architecture.memory_code):
+            return "break"
+        if line in self.breakpoint_lines:
+            self.breakpoint_lines.remove(line)
+            self.code_text.tag_remove('breakpoint', f"{line}.0", f"{line}.end")
+        else:
+            self.breakpoint_lines.add(line)
+            self.code_text.tag_add('breakpoint', f"{line}.0", f"{line}.end")
+        return "break"  # No word selection
+
+    def update_breakpoints(self):
+        """
+        Rebuild the breakpoints from the breakpoint lines and the breakpoints entry
+        :return: True if the breakpoints entry is valid
+        """
+        self.breakpoints.clear()
+        for line in self.breakpoint_lines:
+            self.breakpoints.add_breakpoint(line - 1)
+        try:
+            self.breakpoints.parse(self.breakpoints_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid breakpoints: {e}")
+            return False
+        return True
+
     def simulate(self):
         """
         Simulate the program with Simulation button
+        The program runs in a background thread (quiet mode) up to the end or the next breakpoint, the window stays
+        responsive and shows the progress
+        Unless Record Simulate is checked, the undo log is dropped so the run takes the fast execution loop: the
+        instructions executed before can not be undone any more
         """
+        if not self.update_breakpoints():
+            return
+        if not self.record_simulate.get():
+            self.architecture.disable_undo_log()
+        self.stop_reason_label.config(text="")
         self.clear_highlight()
-        # Implement simulation functionality
-        result = self.architecture.execute_program("full")
-        if result == "END":
-            self.simulate_button.config(state='disabled')
-            self.step_button.config(state='disabled')
+        for button in (self.load_button, self.simulate_button, self.step_button, self.step_back_button):
+            button.config(state='disabled')
+        self.pause_button.config(state='normal', text="Pause")
+        self.stop_button.config(state='normal')
+
+        # Without breakpoints, and without recording, the simulation runs in the fast execution loop
+        breakpoints = self.breakpoints if self.breakpoints.active() else None
+        if breakpoints is None:
+            self.breakpoints.resume_program_counter = None
+        self.worker = SimulationWorker(self.architecture, breakpoints=breakpoints)
+        self.progress = (0, time.perf_counter())
+        self.worker.start()
+        self.master.after(PROGRESS_INTERVAL, self.poll_simulation)
+
+    def poll_simulation(self):
+        """
+        Show the progress of the simulation, called every PROGRESS_INTERVAL milliseconds on the Tk thread
+        """
+        worker = self.worker
+        count, last_time = self.progress
+        now = time.perf_counter()
+        instruction_count = worker.instruction_count
+        if worker.state != PAUSED:
+            self.speed_label.config(text=f"Instructions/s: {(instruction_count - count) / (now - last_time):,.0f}")
+        self.progress = (instruction_count, now)
+
+        if worker.state == DONE:
+            self.finish_simulation()
+        else:
+            if worker.state == PAUSED and not self.paused_shown:
+                self.show_state()
+            self.paused_shown = worker.state == PAUSED
+            self.master.after(PROGRESS_INTERVAL, self.poll_simulation)
+
+    def pause_simulation(self):
+        """
+        Pause or resume the simulation with Pause button
+        """
+        if self.worker.resume_event.is_set():
+            self.worker.pause()
+            self.pause_button.config(text="Resume")
+        else:
+            self.worker.resume()
+            self.pause_button.config(text="Pause")
+
+    def stop_simulation(self):
+        """
+        Stop the simulation with Stop button, the program can be continued with Simulate or Step Simulation
+        """
+        self.worker.stop()
+        self.pause_button.config(state='disabled')
+        self.stop_button.config(state='disabled')
+
+    def finish_simulation(self):
+        """
+        Show the final state when the background thread ended
+        """
+        worker = self.worker
+        self.worker = None
+        self.pause_button.config(state='disabled', text="Pause")
+        self.stop_button.config(state='disabled')
+        self.load_button.config(state='normal')
+        self.speed_label.config(text=f"Instructions/s: {worker.instructions_per_second():,.0f} "
+                                     f"({worker.instruction_count} instructions)")
+        self.show_state()
+
+        if worker.error is not None:
+            messagebox.showerror("Error", f"Simulation failed: {worker.error}")
+        elif worker.result is not None and worker.result.error is not None:
+            messagebox.showerror("Error", f"Simulation stopped: {worker.result.error}")
+        if worker.result is not None and worker.result.halt_reason in (HALT_BREAKPOINT, HALT_WATCHPOINT):
+            self.stop_reason_label.config(text=self.breakpoints.hit)
+        if worker.result is None or worker.result.error is not None \
+                or worker.result.halt_reason in (HALT_BREAKPOINT, HALT_WATCHPOINT):
+            # Stopped: the program can be continued
+            self.simulate_button.config(state='normal')
+            self.step_button.config(state='normal')
+        if self.architecture.undo_log:
+            self.step_back_button.config(state='normal')
+
+    def show_state(self):
+        """
+        Rebuild the displays from the architecture (the simulation thread is paused or ended)
+        """
         self.update_registers_display()
         self.update_memory_display()
         self.update_stack_display()
-        current_line = self.architecture.program_counter + 1
-        self.apply_highlight(current_line)
+        if self.code_generation != self.architecture.binding_generation:
+            for position in self.memory_lines:
+                self.update_code_lines(position)
+            self.code_generation = self.architecture.binding_generation
+        program_counter = self.architecture.program_counter
+        next_instruction = ""
+        if program_counter < len(self.architecture.memory_code):
+            next_instruction = self.translate(program_counter)
+        self.next_instruction_entry.config(state=tk.NORMAL)
+        self.next_instruction_entry.delete(0, tk.END)
+        self.next_instruction_entry.insert(0, next_instruction)
+        self.next_instruction_entry.config(state='readonly')
+        self.clear_highlight()
+        self.apply_highlight(program_counter + 1)
 
     def step_simulation(self):
         """
@@ -254,81 +455,48 @@ class AssemblySimulatorUI:
         """
         self.clear_highlight()
         # Implement step simulation functionality
+        self.stop_reason_label.config(text="")
+        self.architecture.enable_undo_log()  # Dropped by a Simulate run which was not recorded
         result = self.architecture.execute_program("step")
-        self.simulate_button.config(state='disabled')
         if result == "END":
+            self.simulate_button.config(state='disabled')
             self.step_button.config(state='disabled')
             next_instruction = ""
         else:
-            next_instruction = self.translate(self.architecture.memory_code[self.architecture.program_counter])
+            next_instruction = self.translate(self.architecture.program_counter)
 
-        # Update code display if VAD or VDE
+        # The registers, memory, stack and code displays were updated by apply_changes during the step
+        self.code_generation = self.architecture.binding_generation
         print(result)
-        if result == "VAD" or result == "VDE":
-            self.code_text.config(state=tk.NORMAL)
-            self.code_text.delete('1.0', tk.END)
-            for instruction in self.architecture.memory_code:
-                self.code_text.insert('999.0', self.translate(instruction))
-            self.code_text.config(state=tk.DISABLED)
         # Update next instruction display
         self.next_instruction_entry.config(state=tk.NORMAL)  # Allow writing
         self.next_instruction_entry.delete(0, tk.END)
         self.next_instruction_entry.insert(0, next_instruction)
         self.next_instruction_entry.config(state='readonly')  # Prevent further editing
-        self.update_registers_display()
-        self.update_memory_display()
-        self.update_stack_display()
         current_line = self.architecture.program_counter + 1
         self.apply_highlight(current_line)
+        self.step_back_button.config(state='normal')
 
-    def give_address_memory(self, instruction, param_number):
+    def step_back_simulation(self):
         """
-        Give the address of the memory location
-        :param instruction: Instruction containing the memory location
-        :param param_number: Which param to give the address of
-        :return: Instruction with the address of the memory location
+        Undo the last executed instruction with Step Back button (see undo_log.py)
         """
-        match param_number:
-            case 1:
-                index_param = 'param_type_1'
-                index_operand = 'operand_1'
-            case 2:
-                index_param = 'param_type_2'
-                index_operand = 'operand_2'
-            case _: raise ValueError("Invalid param number")
-
-        if instruction[index_param] == "memory":
-            try:
-                # Get variable name from pointer memory
-                for key, value in self.architecture.ptr_memory.items():
-                    if value == instruction[index_operand] or key == instruction[index_operand]:
-                        instruction[index_operand] = key
-                        return instruction
-            except IndexError:
-                raise ValueError("Invalid memory position")
-            # instruction[index_operand] = "???"
-            return instruction
-        raise ValueError("Invalid param type")
-
-    def give_address_register(self, instruction, param_number):
-        match param_number:
-            case 1:
-                index_param = 'param_type_1'
-                index_operand = 'operand_1'
-            case 2:
-                index_param = 'param_type_2'
-                index_operand = 'operand_2'
-            case _: raise ValueError("Invalid param number")
-
-        if instruction[index_param] == "register":
-            match instruction[index_operand]:
-                case "000000000" | "t0": instruction[index_operand] = "t0"
-                case "000000001" | "t1": instruction[index_operand] = "t1"
-                case "000000010" | "t2": instruction[index_operand] = "t2"
-                case "000000011" | "t3": instruction[index_operand] = "t3"
-                case _: raise ValueError("Invalid register")
-            return instruction
-        raise ValueError("Invalid param type")
+        self.stop_reason_label.config(text="")
+        self.architecture.step_back()
+        # The registers, memory, stack and code displays were updated by apply_changes
+        self.code_generation = self.architecture.binding_generation
+        self.simulate_button.config(state='normal')
+        self.step_button.config(state='normal')
+        if not self.architecture.undo_log:
+            self.step_back_button.config(state='disabled')
+
+        program_counter = self.architecture.program_counter
+        self.next_instruction_entry.config(state=tk.NORMAL)
+        self.next_instruction_entry.delete(0, tk.END)
+        self.next_instruction_entry.insert(0, self.translate(program_counter))
+        self.next_instruction_entry.config(state='readonly')
+        self.clear_highlight()
+        self.apply_highlight(program_counter + 1)
 
 if __name__ == "__main__":
     root = tk.Tk()
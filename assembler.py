@@ -0,0 +1,425 @@
+"""
+Assembler: mnemonic source to the 32-bit encoding
+
+Source format:
+    ; Comment until the end of the line
+    #DATA
+    SIZE = 4 * 8            ; Constant, usable in any constant expression below
+    abc SIZE + 1            ; Variable with its initial value (0 if omitted), names are 3 ASCII letters
+    #CODE
+    LDA t0 abc              ; Operands: register (t0-t3), variable name or constant expression
+    loop: INC t0            ; Label, can be used before it is defined
+    BSM t0 SIZE << 2 loop
+    JMP end
+    end: HLT
+
+The variables of #DATA are created by VAD (and set by STR if their initial value is not 0) at the start of the
+program. Constant expressions (+ - * // % << >> & | ^ ~ and parentheses) are folded when assembling.
+
+The labels are resolved in a single pass: a branch to a label that is not defined yet is emitted with an empty label
+field and patched when the label is found. A taken branch sets the program counter to the label field and the program
+counter is then incremented, so the label field of a branch is the target instruction - 1 (targets 1 to 32).
+
+Instructions refer to the memory positions of the variables, they are predicted in the order of the source with the
+allocator of the architecture (lowest free position), so VAD/VDE must be executed in the order they are written.
+"""
+import ast
+import hashlib
+import re
+
+from instructions import OP_CODES, OPERAND_TYPES, PARAM_TYPES
+from machine_state import REGISTER_INDEX, WORD_MASK
+from memory_allocator import MemoryAllocator
+
+SECTIONS = ("#DATA", "#CODE")
+LABEL_MASK = 0b11111
+ASSEMBLE_CACHE_SIZE = 64  # Assembled sources kept by assemble
+WORD_BITS = WORD_MASK.bit_length()
+SNIFF_SIZE = 4096  # Characters read at once by is_assembly_file, a program written on one line is not read whole
+
+OP_CODE_VALUES = {op_code: int(bits, 2) for bits, op_code in OP_CODES.items()}
+BRANCHES = ("BEQ", "BNE", "BBG", "BSM")
+IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+VARIABLE_NAME = re.compile(r'[A-Za-z]{3}')
+
+FOLDED_OPERATORS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.FloorDiv: lambda a, b: a // b,
+    ast.Mod: lambda a, b: a % b,
+    ast.LShift: lambda a, b: a << b,
+    ast.RShift: lambda a, b: a >> b,
+    ast.BitAnd: lambda a, b: a & b,
+    ast.BitOr: lambda a, b: a | b,
+    ast.BitXor: lambda a, b: a ^ b,
+    ast.USub: lambda a: -a,
+    ast.UAdd: lambda a: a,
+    ast.Invert: lambda a: ~a,
+}
+
+assembled = {}  # SHA-256 of the source -> words, oldest entries are evicted first
+
+
+def is_assembly_source(content):
+    """
+    :param content: Content of a program file
+    :return: True if the first line which is not empty or a comment is a section (#DATA or #CODE)
+    """
+    for line in content.splitlines():
+        line = line.split(';', 1)[0].strip()
+        if line:
+            return line.upper() in SECTIONS
+    return False
+
+
+def is_assembly_file(file_path):
+    """
+    :param file_path: Path of the file to check
+    :return: True if the file is a mnemonic source, only the start of its first lines is read
+    """
+    try:
+        with open(file_path, 'r', errors='replace') as f:
+            while True:
+                line = f.readline(SNIFF_SIZE)
+                if not line:
+                    return False
+                text = line.split(';', 1)[0].strip()
+                if text:
+                    return text.upper() in SECTIONS
+                if ';' in line:
+                    # Skip the rest of a long comment line
+                    while not line.endswith('\n'):
+                        line = f.readline(SNIFF_SIZE)
+                        if not line:
+                            return False
+    except FileNotFoundError:
+        raise FileNotFoundError(f'File {file_path} not found')
+
+
+def fold_constant(expression, constants):
+    """
+    Evaluate a constant expression
+    :param expression: Expression to evaluate (e.g. "SIZE * 2 + 1")
+    :param constants: Constants defined so far (name -> value)
+    :return: Value of the expression
+    """
+    def evaluate(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, int) and not isinstance(node.value, bool):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id not in constants:
+                raise ValueError(f"Unknown constant {node.id}")
+            return constants[node.id]
+        if isinstance(node, ast.BinOp) and type(node.op) in FOLDED_OPERATORS:
+            left, right = evaluate(node.left), evaluate(node.right)
+            if isinstance(node.op, (ast.FloorDiv, ast.Mod)) and right == 0:
+                raise ValueError("Division by zero in constant expression")
+            if isinstance(node.op, (ast.LShift, ast.RShift)) and right < 0:
+                raise ValueError("Negative shift count in constant expression")
+            if isinstance(node.op, ast.LShift) and right > WORD_BITS:
+                # Checked before shifting: a huge shift count would not fit in memory
+                raise ValueError(f"Constant {expression.strip()} does not fit in {WORD_BITS} bits")
+            return FOLDED_OPERATORS[type(node.op)](left, right)
+        if isinstance(node, ast.UnaryOp) and type(node.op) in FOLDED_OPERATORS:
+            return FOLDED_OPERATORS[type(node.op)](evaluate(node.operand))
+        raise ValueError(f"Invalid constant expression {expression}")
+
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError:
+        raise ValueError(f"Invalid constant expression {expression}")
+    return evaluate(tree.body)
+
+
+def encode(op_code, param_type_1=0, param_type_2=0, operand_1=0, operand_2=0, label=0):
+    """
+    :param op_code: Name of the op code
+    :param param_type_1: Type parameter 1 (index in PARAM_TYPES)
+    :param param_type_2: Type parameter 2 (index in PARAM_TYPES)
+    :param operand_1: Operand 1 value
+    :param operand_2: Operand 2 value
+    :param label: Label field
+    :return: 32-bit instruction as an int
+    """
+    return (OP_CODE_VALUES[op_code] << 27 | param_type_1 << 25 | param_type_2 << 23 | operand_1 << 14
+            | operand_2 << 5 | label)
+
+
+def encode_variable(op_code, variable_name):
+    """
+    VAD/VDE: the 3 characters of the name (7 bits each) fill operand 1, operand 2 and the label
+    :param op_code: VAD or VDE
+    :param variable_name: Name of the variable
+    :return: 32-bit instruction as an int
+    """
+    constant = PARAM_TYPES.index("constant")
+    characters = [ord(character) for character in variable_name]
+    return (OP_CODE_VALUES[op_code] << 27 | constant << 25 | constant << 23 | characters[0] << 14
+            | characters[1] << 7 | characters[2])
+
+
+class Assembler:
+    """
+    Single-pass assembler, see the module documentation for the source format
+    """
+    def __init__(self):
+        self.words = []
+        self.constants = {}  # Name -> value
+        self.variable_positions = {}  # Name -> predicted memory position
+        self.allocator = MemoryAllocator()
+        self.labels = {}  # Name -> instruction index
+        self.fixups = {}  # Label not defined yet -> [(instruction index, line number)]
+        self.section = None
+        self.line_number = 0
+
+    def assemble(self, source):
+        """
+        :param source: Mnemonic source
+        :return: List of the 32-bit instructions as ints
+        """
+        for self.line_number, line in enumerate(source.splitlines(), 1):
+            line = line.split(';', 1)[0].strip()
+            if line:
+                try:
+                    self.assemble_line(line)
+                except ValueError as e:
+                    raise ValueError(f"Line {self.line_number}: {e}")
+
+        if self.fixups:
+            label, uses = next(iter(self.fixups.items()))
+            raise ValueError(f"Line {uses[0][1]}: Label {label} is not defined")
+        return self.words
+
+    def assemble_line(self, line):
+        """
+        :param line: Line without its comment
+        """
+        if line.upper() in SECTIONS:
+            if line.upper() == "#DATA" and self.section == "#CODE":
+                raise ValueError("#DATA must come before #CODE")
+            self.section = line.upper()
+            return
+        if self.section is None:
+            raise ValueError("Expected #DATA or #CODE")
+
+        # Constant definition
+        name, equal, expression = line.partition('=')
+        if equal:
+            self.define_constant(name.strip(), expression)
+            return
+
+        if self.section == "#DATA":
+            name, *expression = line.split(None, 1)
+            self.define_variable(name, expression[0] if expression else "")
+            return
+
+        # Label definition, optionally followed by an instruction
+        match = re.match(r'([A-Za-z_]\w*)\s*:\s*(.*)', line)
+        if match:
+            self.define_label(match.group(1))
+            line = match.group(2)
+            if not line:
+                return
+        op_code, *operands = line.split(None, 1)
+        self.assemble_instruction(op_code.upper(), operands[0] if operands else "")
+
+    def check_name(self, name):
+        """
+        Verify that a new name is free
+        :param name: Name of a constant or a variable
+        """
+        if not IDENTIFIER.fullmatch(name) or name in REGISTER_INDEX:
+            raise ValueError(f"Invalid name {name}")
+        if name in self.constants or name in self.variable_positions:
+            raise ValueError(f"{name} is already defined")
+
+    def define_constant(self, name, expression):
+        """
+        :param name: Name of the constant
+        :param expression: Constant expression of its value
+        """
+        self.check_name(name)
+        self.constants[name] = fold_constant(expression, self.constants)
+
+    def define_variable(self, name, expression):
+        """
+        #DATA variable: VAD, then STR if the initial value is not 0
+        :param name: Name of the variable
+        :param expression: Constant expression of its initial value (empty for 0)
+        """
+        value = self.fold_operand(expression) if expression else 0
+        self.add_variable(name)
+        if value:
+            self.words.append(encode("STR", PARAM_TYPES.index("memory"), PARAM_TYPES.index("constant"),
+                                     self.variable_positions[name], value))
+
+    def add_variable(self, name):
+        """
+        VAD: predict the memory position of the variable
+        :param name: Name of the variable
+        """
+        if not VARIABLE_NAME.fullmatch(name):
+            raise ValueError(f"Invalid variable name {name} (3 ASCII letters)")
+        self.check_name(name)
+        position = self.allocator.allocate()
+        if position is None:
+            raise ValueError("No space in memory")
+        self.variable_positions[name] = position
+        self.words.append(encode_variable("VAD", name))
+
+    def delete_variable(self, name):
+        """
+        VDE: free the memory position of the variable
+        :param name: Name of the variable
+        """
+        if name not in self.variable_positions:
+            raise ValueError(f"Variable {name} is not defined")
+        self.allocator.release(self.variable_positions.pop(name))
+        self.words.append(encode_variable("VDE", name))
+
+    def define_label(self, name):
+        """
+        Define a label on the next instruction and patch the branches already emitted to it
+        :param name: Name of the label
+        """
+        if name in self.labels:
+            raise ValueError(f"Label {name} is already defined")
+        self.labels[name] = len(self.words)
+        for index, _ in self.fixups.pop(name, []):
+            self.words[index] |= self.label_field(name)
+
+    def label_field(self, name):
+        """
+        :param name: Name of a defined label
+        :return: Label field of a branch to the label
+        """
+        label = self.labels[name] - 1
+        if not 0 <= label <= LABEL_MASK:
+            raise ValueError(f"Label {name} is out of range (branch targets must be instructions 1 to 32)")
+        return label
+
+    def fold_operand(self, expression):
+        """
+        :param expression: Constant expression
+        :return: Value of the expression, verified to fit in an operand
+        """
+        value = fold_constant(expression, self.constants)
+        if not 0 <= value <= WORD_MASK:
+            raise ValueError(f"Constant {expression.strip()} = {value} does not fit in {WORD_BITS} bits")
+        return value
+
+    def parse_operand(self, text):
+        """
+        :param text: Register, variable name or constant expression
+        :return: Type parameter (index in PARAM_TYPES) and operand value
+        """
+        if text in REGISTER_INDEX:
+            return PARAM_TYPES.index("register"), REGISTER_INDEX[text]
+        if text in self.variable_positions:
+            return PARAM_TYPES.index("memory"), self.variable_positions[text]
+        if VARIABLE_NAME.fullmatch(text) and text not in self.constants:
+            raise ValueError(f"Variable {text} is not defined")
+        return PARAM_TYPES.index("constant"), self.fold_operand(text)
+
+    def split_operands(self, text, count):
+        """
+        Split the operands on whitespace, an operand expression can contain spaces between parentheses or around
+        its binary operators (e.g. "t0 SIZE * 2 loop", but "t0 -1" is two operands)
+        :param text: Operands of the instruction
+        :param count: Number of operands expected
+        :return: List of the operands
+        """
+        tokens = text.split()
+        operands = []
+        while tokens:
+            operand = tokens.pop(0)
+            # Glue the tokens while the expression is unfinished (open parenthesis, operator at either end)
+            while tokens and (operand.count('(') > operand.count(')') or operand[-1] in '+-*/%<>&|^~('
+                              or tokens[0][0] in '+*/%<>&|^)' or tokens[0] == '-'):
+                operand += ' ' + tokens.pop(0)
+            operands.append(operand)
+        if len(operands) != count:
+            raise ValueError(f"Expected {count} operands, found {len(operands)}")
+        return operands
+
+    def assemble_instruction(self, op_code, text):
+        """
+        :param op_code: Mnemonic
+        :param text: Operands of the instruction
+        """
+        if op_code not in OPERAND_TYPES:
+            raise ValueError(f"Unknown instruction {op_code}")
+        if op_code == "HLT":
+            self.split_operands(text, 0)
+            self.words.append(encode("HLT"))
+        elif op_code == "VAD":
+            self.add_variable(*self.split_operands(text, 1))
+        elif op_code == "VDE":
+            self.delete_variable(*self.split_operands(text, 1))
+        elif op_code == "JMP":
+            label, = self.split_operands(text, 1)
+            self.words.append(encode("JMP", PARAM_TYPES.index("label")))
+            self.reference_label(label)
+        else:
+            types_1, types_2 = OPERAND_TYPES[op_code]
+            count = 1 + (types_2 is not None) + (op_code in BRANCHES)
+            parts = self.split_operands(text, count)
+            param_type_1, operand_1 = self.parse_operand(parts[0])
+            param_type_2, operand_2 = self.parse_operand(parts[1]) if types_2 else (0, 0)
+            if PARAM_TYPES[param_type_1] not in types_1:
+                raise ValueError(f"{op_code}: operand 1 can not be a {PARAM_TYPES[param_type_1]}")
+            if types_2 and PARAM_TYPES[param_type_2] not in types_2:
+                raise ValueError(f"{op_code}: operand 2 can not be a {PARAM_TYPES[param_type_2]}")
+            self.words.append(encode(op_code, param_type_1, param_type_2, operand_1, operand_2))
+            if op_code in BRANCHES:
+                self.reference_label(parts[2])
+
+    def reference_label(self, label):
+        """
+        Fill the label field of the last instruction, or record it to be patched when the label is defined
+        A constant expression is used as the label field itself
+        :param label: Name of a label or constant expression
+        """
+        index = len(self.words) - 1
+        if label in self.labels:
+            self.words[index] |= self.label_field(label)
+        elif IDENTIFIER.fullmatch(label) and label not in self.constants:
+            self.fixups.setdefault(label, []).append((index, self.line_number))
+        else:
+            value = fold_constant(label, self.constants)
+            if not 0 <= value <= LABEL_MASK:
+                raise ValueError(f"Label {label} = {value} does not fit in 5 bits")
+            self.words[index] |= value
+
+
+def assemble(source):
+    """
+    Assemble a mnemonic source, the result is cached by the SHA-256 of the source
+    :param source: Mnemonic source
+    :return: Tuple of the 32-bit instructions as ints
+    """
+    key = hashlib.sha256(source.encode()).digest()
+    words = assembled.get(key)
+    if words is None:
+        words = tuple(Assembler().assemble(source))
+        if len(assembled) >= ASSEMBLE_CACHE_SIZE:
+            del assembled[next(iter(assembled))]
+        assembled[key] = words
+    return words
+
+
+def assemble_file(file_path):
+    """
+    :param file_path: Path of the mnemonic source
+    :return: Tuple of the 32-bit instructions as ints
+    """
+    try:
+        with open(file_path, 'r') as f:
+            source = f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f'File {file_path} not found')
+    try:
+        return assemble(source)
+    except ValueError as e:
+        raise ValueError(f'File {file_path} is not a valid source ({e})')
@@ -0,0 +1,149 @@
+"""
+Batch execution of many programs across a process pool
+
+Every worker process keeps one Architecture and resets it with clear_memory between programs. The programs are sent
+to the workers in chunks and the results are written as JSON Lines in the order of the programs, one line per program:
+    {"file": ..., "halt_reason": ..., "instruction_count": ..., "error": ..., "program_counter": ...,
+     "registers": {...}, "variables": {...}, "variable_positions": {...}, "memory": [...], "stack": [...]}
+A program which can not be loaded (for any reason, e.g. a directory or an unreadable file) has the halt reason
+LOAD_ERROR and no state. An unexpected error of the simulator only stops its program, with the halt reason ERROR and
+no state. A program which runs for more than --max-instructions instructions (10 000 000 by default) or --time-limit
+seconds is stopped with the halt reason INSTRUCTION_LIMIT or TIME_LIMIT, so a runaway program does not block its
+worker.
+
+Usage: python batch_runner.py <directory or program file>... [--manifest FILE] [--output FILE] [--workers N]
+                              [--max-instructions N] [--time-limit SECONDS]
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from Assembly import Architecture
+from execution import HALT_ERROR, HALT_INSTRUCTION_LIMIT, HALT_TIME_LIMIT, ExecutionResult
+from program_format import EXTENSION
+
+PROGRAM_EXTENSIONS = ('.txt', EXTENSION, '.asm')
+HALT_LOAD_ERROR = "LOAD_ERROR"  # The program could not be loaded
+CHUNK_SIZE = 16  # Programs sent to a worker at once
+MAX_INSTRUCTIONS = 10_000_000  # Default instruction limit of a program
+
+worker_architecture = None
+worker_options = {}  # Keyword arguments of execute_program
+
+
+def find_programs(paths, manifest=None):
+    """
+    :param paths: Program files and directories (the program files they contain, sorted by name)
+    :param manifest: Path of a file listing one program file per line, None if there is none
+    :return: List of the program files
+    """
+    programs = []
+    for path in paths:
+        if os.path.isdir(path):
+            programs.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                            if name.endswith(PROGRAM_EXTENSIONS))
+        else:
+            programs.append(path)
+
+    if manifest is not None:
+        try:
+            with open(manifest, 'r') as f:
+                programs.extend(line.strip() for line in f if line.strip())
+        except FileNotFoundError:
+            raise FileNotFoundError(f'File {manifest} not found')
+    return programs
+
+
+def init_worker(engine, max_instructions, time_limit):
+    """
+    Create the Architecture reused by the worker process
+    :param engine: Engine of the quiet execution (interpreter or block)
+    :param max_instructions: Maximum number of instructions of a program, None for no limit
+    :param time_limit: Maximum execution time of a program in seconds, None for no limit
+    """
+    global worker_architecture, worker_options
+    worker_architecture = Architecture()
+    worker_options = {'engine': engine, 'max_instructions': max_instructions, 'time_limit': time_limit}
+
+
+def error_result(file_path, halt_reason, error):
+    """
+    :param file_path: Path of the program
+    :param halt_reason: Halt reason to report
+    :param error: Exception which stopped the program
+    :return: Result without state as a JSON serializable dictionary
+    """
+    result = dict.fromkeys(ExecutionResult.__slots__)
+    result.update(halt_reason=halt_reason, instruction_count=0, error=f"{type(error).__name__}: {error}")
+    return {'file': file_path, **result}
+
+
+def run_program(file_path):
+    """
+    Execute a program in the worker process
+    :param file_path: Path of the program
+    :return: Result as a JSON serializable dictionary
+    """
+    architecture = worker_architecture
+    architecture.clear_memory()
+    try:
+        architecture.fetch_data(file_path)
+    except Exception as e:
+        return error_result(file_path, HALT_LOAD_ERROR, e)
+    try:
+        return {'file': file_path, **architecture.execute_program("quiet", **worker_options).to_dict()}
+    except Exception as e:
+        # The errors of the instructions are in the result, anything else must not stop the other programs
+        return error_result(file_path, HALT_ERROR, e)
+
+
+def run_batch(programs, output, workers=None, engine="interpreter", chunk_size=CHUNK_SIZE,
+              max_instructions=MAX_INSTRUCTIONS, time_limit=None):
+    """
+    Execute the programs across a process pool and write their results
+    :param programs: Paths of the programs
+    :param output: Text file to write the JSON Lines to
+    :param workers: Number of worker processes (number of CPUs if None)
+    :param engine: Engine of the quiet execution (interpreter or block)
+    :param chunk_size: Number of programs sent to a worker at once
+    :param max_instructions: Maximum number of instructions of a program, None for no limit
+    :param time_limit: Maximum execution time of a program in seconds, None for no limit
+    :return: Number of programs which halted on an error, on a limit or could not be loaded
+    """
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(engine, max_instructions, time_limit)) as executor:
+        for result in executor.map(run_program, programs, chunksize=chunk_size):
+            if result['error'] is not None or result['halt_reason'] in (HALT_INSTRUCTION_LIMIT, HALT_TIME_LIMIT):
+                failures += 1
+            output.write(json.dumps(result) + '\n')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Execute many programs across a process pool")
+    parser.add_argument("paths", nargs="*", help="program files or directories of program files")
+    parser.add_argument("--manifest", help="file listing one program file per line")
+    parser.add_argument("--output", help="JSON Lines file to write (standard output by default)")
+    parser.add_argument("--workers", type=int, help="number of worker processes (number of CPUs by default)")
+    parser.add_argument("--engine", choices=["interpreter", "block"], default="interpreter")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="programs sent to a worker at once")
+    parser.add_argument("--max-instructions", type=int, default=MAX_INSTRUCTIONS,
+                        help="instruction limit of a program (0 for no limit)")
+    parser.add_argument("--time-limit", type=float, help="time limit of a program in seconds")
+    args = parser.parse_args()
+
+    programs = find_programs(args.paths, args.manifest)
+    limits = (args.max_instructions or None, args.time_limit)
+    if args.output:
+        with open(args.output, 'w') as output:
+            failures = run_batch(programs, output, args.workers, args.engine, args.chunk_size, *limits)
+    else:
+        failures = run_batch(programs, sys.stdout, args.workers, args.engine, args.chunk_size, *limits)
+    print(f"{len(programs)} programs, {failures} failed", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""
+Benchmark suite of the simulator core
+
+Runs sample.txt to sample_4.txt and synthetic programs (ALU-heavy, branch-heavy, stack-heavy, VAD/VDE churn) through
+Architecture.execute_program in quiet mode with each engine, and reports for every program:
+    - instructions per second (best of the timed samples)
+    - load time (fetch_data, best run)
+    - peak memory allocated during load and execution (tracemalloc, separate run)
+The program is executed once before timing (the block engine translates its blocks), then each timed sample executes
+it again from its loaded state (snapshot) until the sample lasts MIN_SAMPLE_TIME, so a program of a few instructions
+is not measured with a single timer reading. The samples are taken in rounds, one sample of every program per round.
+The results can be saved as JSON and compared against a saved baseline: a program whose instructions per second drop
+by more than the threshold is a regression and the exit status is 1. Programs executing in less than GATED_RUN_TIME
+are too short to be measured reliably: their change is shown in parentheses and never reported as a regression.
+With --verify, every program is first executed in lockstep by the interpreter and each other benchmarked engine
+(differential.py): an engine whose state diverges from the interpreter is reported and the exit status is 1.
+
+With --dispatch, runs sample_4.txt and a sample_4-style loop (INC / AND / BSM back to the top) through the same
+execution loop with:
+    - eval dispatch: eval("self." + op_code + "(instruction)"), the dispatch used before the handler table
+    - table dispatch: Instruction.handlers indexed by the 5-bit op code value
+    - block engine: basic blocks translated to Python functions (block_engine.py), translation time included
+and prints the cost per executed instruction of each.
+
+Usage: python benchmark.py [--repeat N] [--engine ENGINE] [--output FILE] [--baseline FILE] [--threshold RATIO]
+                           [--verify]
+       python benchmark.py --dispatch [--repeat N]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from Assembly import Architecture
+from assembler import assemble
+from differential import compare_engines
+from instructions import decode_word
+from program_format import EXTENSION, write_packed
+
+SAMPLES = ("sample.txt", "sample_2.txt", "sample_3.txt", "sample_4.txt")
+ENGINES = ("interpreter", "block")
+THRESHOLD = 0.10  # Slowdown (share of the baseline instructions per second) reported as a regression
+MIN_SAMPLE_TIME = 0.05  # Seconds of execution of a timed sample, the program is executed again until it is reached
+GATED_RUN_TIME = 0.001  # Seconds of a single execution under which a program is left out of the regression check
+
+# Synthetic programs: an inner loop of 500 turns repeated 20 times by an outer loop counting in the variable cnt
+OUTER_LOOP = """
+        LDA t0 cnt
+        INC t0
+        STR cnt t0
+        BSM t0 OUTER outer
+        HLT
+"""
+SYNTHETIC_PROGRAMS = {
+    "alu": """
+#DATA
+INNER = 500
+OUTER = 20
+cnt 0
+#CODE
+outer:  LDA t3 0
+inner:  LDA t0 t3
+        ADD t0 7
+        AND t0 255
+        MUL t0 2
+        LDA t1 3
+        DIV t1 t0           ; t1 = t0 // 3
+        LDA t2 100
+        MOD t2 t1           ; t2 = t1 % 100
+        OR t2 1
+        NOT t2
+        SUB t2 511          ; t2 = 511 - t2
+        INC t3
+        BSM t3 INNER inner
+""" + OUTER_LOOP,
+    "branch": """
+#DATA
+INNER = 500
+OUTER = 20
+cnt 0
+#CODE
+outer:  LDA t3 0
+inner:  BEQ t3 7 first
+first:  BNE t3 t2 second
+second: BBG t3 INNER // 2 third
+        INC t2
+third:  BSM t3 100 fourth
+        ADD t2 3
+fourth: AND t2 63
+        BEQ t2 t3 fifth
+fifth:  INC t3
+        BSM t3 INNER inner
+""" + OUTER_LOOP,
+    "stack": """
+#DATA
+INNER = 500
+OUTER = 20
+cnt 0
+#CODE
+outer:  LDA t3 0
+inner:  PUSH t3
+        PUSH 5
+        PUSH cnt
+        POP t0
+        POP t1
+        POP t2
+        PUSH t2
+        PUSH t1
+        POP t0
+        POP t1
+        INC t3
+        BSM t3 INNER inner
+""" + OUTER_LOOP,
+    "vad_vde": """
+#DATA
+INNER = 500
+OUTER = 20
+cnt 0
+#CODE
+outer:  LDA t3 0
+inner:  VAD tmp
+        STR tmp t3
+        LDA t0 tmp
+        VAD two
+        STR two 5
+        ADD t0 two
+        VDE tmp
+        VDE two
+        INC t3
+        BSM t3 INNER inner
+""" + OUTER_LOOP,
+}
+
+
+def encode_word(op_code, param_type_1="00", param_type_2="00", operand_1=0, operand_2=0, label=0):
+    """
+    Build a 32-bit instruction
+    :param op_code: 5-bit op code (binary string)
+    :param param_type_1: 2-bit type of operand 1 (binary string)
+    :param param_type_2: 2-bit type of operand 2 (binary string)
+    :param operand_1: Operand 1 value
+    :param operand_2: Operand 2 value
+    :param label: Label value
+    :return: 32-bit instruction as an int
+    """
+    return int(op_code + param_type_1 + param_type_2, 2) << 23 | operand_1 << 14 | operand_2 << 5 | label
+
+
+def loop_program():
+    """
+    sample_4-style tight loop: t0 counts up to 500, t1 takes t0 AND 15 on every turn
+    :return: List of DecodedInstruction
+    """
+    words = [
+        encode_word("00000", "00", "01", 0, 0),  # 0: LDA t0 0
+        encode_word("01010", "00", "00", 0),  # 1: INC t0
+        encode_word("00000", "00", "00", 1, 0),  # 2: LDA t1 t0
+        encode_word("00011", "00", "01", 1, 15),  # 3: AND t1 15
+        encode_word("01111", "00", "01", 0, 500, 0),  # 4: BSM t0 500 -> line 1
+        encode_word("10001"),  # 5: HLT
+    ]
+    return [decode_word(word) for word in words]
+
+
+def eval_dispatch(instruction_set, instruction):
+    """
+    Dispatch used before the handler table, kept here as the reference
+    :param instruction_set: Instruction object
+    :param instruction: Instruction to execute
+    """
+    if instruction.error:
+        instruction_set.raise_decoding_error(instruction)
+    return eval("instruction_set." + instruction.op_code + "(instruction)")
+
+
+def table_dispatch(instruction_set, instruction):
+    """
+    :param instruction_set: Instruction object
+    :param instruction: Instruction to execute
+    """
+    return instruction_set.execute_instruction(instruction)
+
+
+def run(memory_code, dispatch):
+    """
+    Execute the program without any output, same loop as Architecture.execute_full_program
+    :param memory_code: Decoded program
+    :param dispatch: Dispatch function to use
+    :return: Number of executed instructions
+    """
+    architecture = Architecture()
+    architecture.memory_code = memory_code
+    instruction_set = architecture.instruction
+    count = 0
+    while architecture.program_counter < len(memory_code):
+        dispatch(instruction_set, memory_code[architecture.program_counter])
+        architecture.program_counter += 1
+        count += 1
+    return count
+
+
+def run_blocks(memory_code):
+    """
+    Execute the program with the block engine
+    :param memory_code: Decoded program
+    :return: Number of executed instructions
+    """
+    architecture = Architecture()
+    architecture.memory_code = memory_code
+    return architecture.execute_program("quiet", engine="block").instruction_count
+
+
+def measure(memory_code, runner, repeat):
+    """
+    :param memory_code: Decoded program
+    :param runner: Function executing the program and returning the number of executed instructions
+    :param repeat: Number of runs
+    :return: Best time per executed instruction in nanoseconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        count = runner(memory_code)
+        elapsed = (time.perf_counter_ns() - start) / count
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def compare_dispatch(repeat):
+    """
+    Print the cost per executed instruction of each dispatch
+    :param repeat: Number of runs of each program
+    """
+    architecture = Architecture()
+    architecture.fetch_data("sample_4.txt")
+    programs = {"sample_4.txt": architecture.memory_code, "sample_4-style loop": loop_program()}
+
+    print(f"{'program':<22}{'eval ns/instr':>16}{'table ns/instr':>16}{'block ns/instr':>16}")
+    for name, memory_code in programs.items():
+        eval_time = measure(memory_code, lambda code: run(code, eval_dispatch), repeat)
+        table_time = measure(memory_code, lambda code: run(code, table_dispatch), repeat)
+        block_time = measure(memory_code, run_blocks, repeat)
+        print(f"{name:<22}{eval_time:>16.0f}{table_time:>16.0f}{block_time:>16.0f}")
+
+
+def write_synthetic_programs(directory):
+    """
+    Assemble the synthetic programs and save them in the packed format
+    :param directory: Directory to write the programs to
+    :return: Dictionary name -> path of the program
+    """
+    paths = {}
+    for name, source in SYNTHETIC_PROGRAMS.items():
+        paths[name] = os.path.join(directory, name + EXTENSION)
+        write_packed(paths[name], assemble(source))
+    return paths
+
+
+class ProgramBenchmark:
+    def __init__(self, file_path, engine, repeat):
+        """
+        Load the program (best load time of repeat loads), measure its peak memory and execute it once untimed (the
+        block engine translates the blocks, which are reused by the timed samples)
+        :param file_path: Path of the program
+        :param engine: Engine of the quiet execution
+        :param repeat: Number of loads
+        """
+        self.engine = engine
+        architecture = self.architecture = Architecture()
+        self.load_time = None
+        for _ in range(repeat):
+            architecture.clear_memory()
+            start = time.perf_counter()
+            architecture.fetch_data(file_path)
+            load_time = time.perf_counter() - start
+            self.load_time = load_time if self.load_time is None else min(self.load_time, load_time)
+
+        # Separate run, tracemalloc slows down the execution
+        architecture.clear_memory()
+        tracemalloc.start()
+        try:
+            architecture.fetch_data(file_path)
+            architecture.execute_program("quiet", engine)
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        architecture.clear_memory()
+        architecture.fetch_data(file_path)
+        self.loaded = architecture.take_snapshot()
+        result = architecture.execute_program("quiet", engine)
+        if result.error is not None:
+            raise ValueError(f"{file_path} halted on an error: {result.error}")
+        self.instructions = result.instruction_count
+        self.run_time = None  # Best time of one execution
+
+    def sample(self):
+        """
+        Time one sample: the program is executed from its loaded state until the sample lasts MIN_SAMPLE_TIME
+        """
+        architecture = self.architecture
+        runs = 0
+        elapsed = 0.0
+        while elapsed < MIN_SAMPLE_TIME:
+            architecture.restore_snapshot(self.loaded)
+            start = time.perf_counter()
+            architecture.execute_program("quiet", self.engine)
+            elapsed += time.perf_counter() - start
+            runs += 1
+        self.run_time = elapsed / runs if self.run_time is None else min(self.run_time, elapsed / runs)
+
+    def result(self):
+        """
+        :return: Dictionary with the instruction count, instructions per second, time of one execution, load time
+        and peak memory
+        """
+        return {
+            'instructions': self.instructions,
+            'instructions_per_second': self.instructions / self.run_time if self.run_time else 0.0,
+            'run_time': self.run_time,
+            'load_time': self.load_time,
+            'peak_memory': self.peak_memory,
+        }
+
+
+def gated(result, reference):
+    """
+    :param result: Result of a program
+    :param reference: Baseline result of the program
+    :return: True if the program runs long enough for its change to be checked against the threshold
+    """
+    return min(result['run_time'], reference.get('run_time', result['run_time'])) >= GATED_RUN_TIME
+
+
+def run_suite(engines, repeat, verify=False):
+    """
+    :param engines: Engines to benchmark
+    :param repeat: Number of timed samples of each program
+    :param verify: Compare the state of every engine with the interpreter before benchmarking it
+    :return: Results, JSON serializable (with the divergences found if verify is True)
+    """
+    benchmarks = {}
+    divergences = {}
+    with tempfile.TemporaryDirectory() as directory:
+        programs = {name: name for name in SAMPLES}
+        programs.update(write_synthetic_programs(directory))
+        for name, file_path in programs.items():
+            for engine in engines:
+                if verify and engine != "interpreter":
+                    divergence, _ = compare_engines(file_path, ("interpreter", engine))
+                    if divergence is not None:
+                        divergences[f"{name}/{engine}"] = repr(divergence)
+                        continue
+                benchmarks[f"{name}/{engine}"] = ProgramBenchmark(file_path, engine, repeat)
+    # One sample of every program per round: the samples of a program are spread over the whole suite, so a slow
+    # period of the machine does not spoil all of them
+    for _ in range(repeat):
+        for benchmark in benchmarks.values():
+            benchmark.sample()
+    results = {name: benchmark.result() for name, benchmark in benchmarks.items()}
+    suite = {'python': platform.python_version(), 'platform': platform.platform(), 'results': results}
+    if verify:
+        suite['divergences'] = divergences
+    return suite
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    :param results: Results of run_suite
+    :param baseline: Saved results of run_suite
+    :param threshold: Slowdown reported as a regression
+    :return: Dictionary benchmark -> change of the instructions per second (share of the baseline) of the regressions
+    """
+    regressions = {}
+    for name, result in results['results'].items():
+        reference = baseline['results'].get(name)
+        if reference and reference['instructions_per_second'] and gated(result, reference):
+            change = result['instructions_per_second'] / reference['instructions_per_second'] - 1
+            if change < -threshold:
+                regressions[name] = change
+    return regressions
+
+
+def print_results(results, baseline=None):
+    """
+    :param results: Results of run_suite
+    :param baseline: Saved results of run_suite, None if there is none
+    """
+    print(f"{'benchmark':<26}{'instructions':>14}{'instr/s':>14}{'load ms':>10}{'peak KiB':>10}{'change':>10}")
+    for name, result in results['results'].items():
+        reference = baseline['results'].get(name) if baseline else None
+        change = ""
+        if reference and reference['instructions_per_second']:
+            change = f"{result['instructions_per_second'] / reference['instructions_per_second'] - 1:+.1%}"
+            if not gated(result, reference):
+                change = f"({change})"
+        print(f"{name:<26}{result['instructions']:>14}{result['instructions_per_second']:>14.0f}"
+              f"{result['load_time'] * 1000:>10.2f}{result['peak_memory'] / 1024:>10.1f}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite of the simulator core")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of timed samples of each program (best one is kept)")
+    parser.add_argument("--engine", choices=ENGINES + ("all",), default="all", help="engine to benchmark")
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="slowdown reported as a regression (share of the baseline instructions per second)")
+    parser.add_argument("--dispatch", action="store_true", help="compare the instruction dispatches instead")
+    parser.add_argument("--verify", action="store_true",
+                        help="check that every engine matches the interpreter before benchmarking it")
+    args = parser.parse_args()
+
+    if args.dispatch:
+        compare_dispatch(args.repeat)
+        return
+
+    results = run_suite(ENGINES if args.engine == "all" else (args.engine,), args.repeat, args.verify)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    for name, divergence in results.get('divergences', {}).items():
+        print(f"Divergence: {name} {divergence}", file=sys.stderr)
+        failed = True
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for name, change in regressions.items():
+            print(f"Regression: {name} {change:+.1%} instructions per second", file=sys.stderr)
+        failed = failed or bool(regressions)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
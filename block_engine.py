@@ -0,0 +1,311 @@
+"""
+Basic-block translation engine
+
+The program is split into basic blocks: a block starts at a branch target (or wherever the execution enters it) and
+ends after a branch (BEQ/BNE/BBG/BSM/JMP), HLT, VAD or VDE. Each block is translated once into a Python function
+doing the work of its instructions in straight-line code, with the operands inlined, so executing a block costs one
+call instead of one dispatch per instruction.
+
+The translated blocks are cached by their first program counter. A block checks the variables of its memory operands
+when it is translated, so after VAD/VDE change the variables (Architecture.binding_generation) a block is only reused
+if its memory operands are still bound (or still unbound) to a variable.
+"""
+import time
+
+from control_flow import BRANCHES
+from execution import CHECK_INTERVAL, HALT_END_OF_PROGRAM, HALT_ERROR, HALT_HLT, HALT_TIME_LIMIT, ExecutionResult
+from instructions import OPERAND_TYPES
+from machine_state import STACK_LIMIT, WORD_MASK
+
+MAX_BLOCK_LENGTH = 256
+COMPARISONS = {"BEQ": "==", "BNE": "!=", "BBG": ">", "BSM": "<"}
+TERMINATORS = BRANCHES + ("JMP", "HLT", "VAD", "VDE")
+
+
+class Block:
+    """
+    Translated basic block
+    """
+    __slots__ = ('start', 'length', 'function', 'line_program_counters', 'ends_with_hlt', 'source', 'bindings',
+                 'generation')
+
+    def __init__(self, start, length, function, line_program_counters, ends_with_hlt, source, bindings, generation):
+        """
+        :param start: Program counter of the first instruction
+        :param length: Number of instructions
+        :param function: Translated code, function(registers, memory, stack) returning the next program counter
+        :param line_program_counters: Program counter of the instruction of each line of the source
+        :param ends_with_hlt: True if the last instruction is HLT
+        :param source: Python source of the function
+        :param bindings: (memory position, True if a variable is stored there) of the memory operands
+        :param generation: Architecture.binding_generation when the bindings were last verified
+        """
+        self.start = start
+        self.length = length
+        self.function = function
+        self.line_program_counters = line_program_counters
+        self.ends_with_hlt = ends_with_hlt
+        self.source = source
+        self.bindings = bindings
+        self.generation = generation
+
+
+class BlockEngine:
+    def __init__(self, architecture):
+        """
+        :param architecture: Architecture to execute
+        """
+        self.architecture = architecture
+        self.program = None
+        self.leaders = set()
+        self.blocks = {}  # First program counter -> Block
+
+    def reset(self):
+        """
+        Drop the translated blocks, they are translated again on their next execution
+        """
+        self.blocks = {}
+
+    def check_program(self):
+        """
+        Reset the engine if a new program was loaded
+        """
+        if self.architecture.memory_code is not self.program:
+            self.program = self.architecture.memory_code
+            # A mapped program is decoded lazily: without the leaders, blocks only end at their terminator
+            self.leaders = (self.architecture.control_flow_graph().leaders if isinstance(self.program, list)
+                            else set())
+            self.reset()
+
+    def execute(self, max_instructions=None, time_limit=None):
+        """
+        Execute the program from the current program counter until it halts
+        Errors raised by the instructions stop the execution and are reported in the result
+        The limits are checked between blocks: the time limit once CHECK_INTERVAL instructions went by, and a block
+        which would go over max_instructions is left to the interpreter to stop on the exact instruction
+        :param max_instructions: Maximum number of instructions to execute, None for no limit
+        :param time_limit: Maximum execution time in seconds, None for no limit
+        :return: ExecutionResult
+        """
+        architecture = self.architecture
+        self.check_program()
+        end = len(self.program)
+        registers = architecture.register_words
+        memory = architecture.memory_words
+        stack = architecture.stack_words
+        program_counter = architecture.program_counter
+        count = 0
+        block = None
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        next_check = 0
+        try:
+            while program_counter < end:
+                if deadline is not None and count >= next_check:
+                    if time.perf_counter() >= deadline:
+                        architecture.program_counter = program_counter
+                        return ExecutionResult(architecture, HALT_TIME_LIMIT, count)
+                    next_check = count + CHECK_INTERVAL
+                block = self.blocks.get(program_counter)
+                if block is None or (block.generation != architecture.binding_generation
+                                     and not self.still_valid(block)):
+                    try:
+                        block = self.blocks[program_counter] = self.translate(program_counter)
+                    except (ValueError, OverflowError):
+                        # Invalid instruction of a mapped program, only decoded now: the interpreter executes the
+                        # instructions before it and stops on it
+                        architecture.program_counter = program_counter
+                        result = architecture.execute_quiet_program(
+                            max_instructions=None if max_instructions is None else max_instructions - count)
+                        result.instruction_count += count
+                        return result
+                if max_instructions is not None and count + block.length > max_instructions:
+                    # The interpreter executes what is left of the budget and stops on the exact instruction
+                    architecture.program_counter = program_counter
+                    result = architecture.execute_quiet_program(max_instructions=max_instructions - count)
+                    result.instruction_count += count
+                    return result
+                program_counter = block.function(registers, memory, stack)
+                count += block.length
+        except BaseException as e:
+            # Stop on the instruction which raised the error, like the interpreter
+            architecture.program_counter = self.fault_program_counter(block, e)
+            count += architecture.program_counter - block.start
+            if isinstance(e, (ValueError, OverflowError, ZeroDivisionError)):
+                return ExecutionResult(architecture, HALT_ERROR, count, f"{type(e).__name__}: {e}")
+            raise
+
+        architecture.program_counter = program_counter
+        if block is not None and block.ends_with_hlt:
+            return ExecutionResult(architecture, HALT_HLT, count)
+        return ExecutionResult(architecture, HALT_END_OF_PROGRAM, count)
+
+    def still_valid(self, block):
+        """
+        Verify the memory operands of a block after the variables changed
+        :param block: Block to verify
+        :return: True if the block can be reused
+        """
+        position_variables = self.architecture.position_variables
+        for position, bound in block.bindings:
+            if (position in position_variables) != bound:
+                return False
+        block.generation = self.architecture.binding_generation
+        return True
+
+    @staticmethod
+    def fault_program_counter(block, error):
+        """
+        Find the instruction which raised an error inside a block, from the line of the traceback
+        :param block: Block being executed
+        :param error: Error raised
+        :return: Program counter of the instruction
+        """
+        traceback = error.__traceback__
+        while traceback is not None:
+            if traceback.tb_frame.f_code is block.function.__code__:
+                return block.line_program_counters[traceback.tb_lineno - 1]
+            traceback = traceback.tb_next
+        return block.start
+
+    def operand(self, param_type, operand):
+        """
+        :param param_type: Type of the operand
+        :param operand: Resolved operand
+        :return: Python expression of the operand value
+        """
+        if param_type == "register":
+            return f"registers[{operand}]"
+        if param_type == "constant":
+            return str(operand)
+        return f"memory[{operand}]"
+
+    @staticmethod
+    def memory_operands(instruction):
+        """
+        :param instruction: Instruction without decoding error
+        :return: Memory positions of the memory operands, in the order they are read
+        """
+        types_1, types_2 = OPERAND_TYPES[instruction.op_code]
+        positions = []
+        if types_1 and instruction.param_type_1 == "memory":
+            positions.append(instruction.operand_1)
+        if types_2 and instruction.param_type_2 == "memory":
+            positions.append(instruction.operand_2)
+        return positions
+
+    def translate_instruction(self, instruction, program_counter, constants):
+        """
+        Translate one instruction
+        :param instruction: Instruction to translate
+        :param program_counter: Program counter of the instruction
+        :param constants: Names available to the translated code, completed with what the instruction needs
+        :return: Lines of Python code (without indentation)
+        """
+        op_code = instruction.op_code
+        if instruction.error:
+            constants[f"instruction_{program_counter}"] = instruction
+            return [f"raise_decoding_error(instruction_{program_counter})"]
+        position_variables = self.architecture.position_variables
+        if any(position not in position_variables for position in self.memory_operands(instruction)):
+            return ['raise ValueError("Invalid memory position: variable not found")']
+
+        destination = f"registers[{instruction.operand_1}]"
+        source = self.operand(instruction.param_type_2, instruction.operand_2)
+        match op_code:
+            case "LDA":
+                return [f"{destination} = {source}"]
+            case "STR":
+                return [f"memory[{instruction.operand_1}] = {source}"]
+            case "PUSH":
+                return [f"value = {self.operand(instruction.param_type_1, instruction.operand_1)}",
+                        f"if len(stack) > {STACK_LIMIT}: raise OverflowError('Stack overflow')",
+                        "stack.append(value)"]
+            case "POP":
+                return ["if not stack: raise OverflowError('Stack underflow')",
+                        f"{destination} = stack.pop()"]
+            case "AND":
+                return [f"{destination} = {destination} & {source}"]
+            case "OR":
+                return [f"{destination} = {destination} | {source}"]
+            case "NOT":
+                return [f"{destination} = ~{destination} & {WORD_MASK}"]
+            case "ADD":
+                return [f"value = {destination} + {source}",
+                        f"if value > {WORD_MASK}: raise OverflowError('Overflow')",
+                        f"{destination} = value"]
+            case "SUB":
+                return [f"value = {source} - {destination}",
+                        "if value < 0: raise OverflowError('Underflow')",
+                        f"{destination} = value"]
+            case "DIV" | "MOD":
+                operator = "//" if op_code == "DIV" else "%"
+                return [f"value = {source}",
+                        f"if {destination} == 0: raise ZeroDivisionError('Division by zero')",
+                        f"{destination} = value {operator} {destination}"]
+            case "MUL":
+                return [f"value = {source} * {destination}",
+                        f"if value > {WORD_MASK}: raise OverflowError('Overflow')",
+                        f"{destination} = value"]
+            case "INC":
+                return [f"value = {destination} + 1",
+                        f"if value > {WORD_MASK}: raise OverflowError('Overflow')",
+                        f"{destination} = value"]
+            case "DEC":
+                return [f"if {destination} == 0: raise OverflowError('Underflow')",
+                        f"{destination} -= 1"]
+            case "BEQ" | "BNE" | "BBG" | "BSM":
+                operand_1 = self.operand(instruction.param_type_1, instruction.operand_1)
+                return [f"if {operand_1} {COMPARISONS[op_code]} {source}: return {instruction.label + 1}",
+                        f"return {program_counter + 1}"]
+            case "JMP":
+                return [f"return {instruction.label + 1}"]
+            case "HLT":
+                return [f"return {len(self.program)}"]
+            case "VAD" | "VDE":
+                constants[f"instruction_{program_counter}"] = instruction
+                return [f"{op_code}(instruction_{program_counter})", f"return {program_counter + 1}"]
+        raise ValueError("Instruction not found")
+
+    def translate(self, start):
+        """
+        Translate the basic block starting at a program counter
+        :param start: Program counter of the first instruction
+        :return: Block
+        """
+        instruction_set = self.architecture.instruction
+        constants = {
+            'raise_decoding_error': instruction_set.raise_decoding_error,
+            'VAD': instruction_set.VAD,
+            'VDE': instruction_set.VDE,
+        }
+        lines = [f"def block_{start}(registers, memory, stack):"]
+        line_program_counters = [start]
+        bindings = set()
+        position_variables = self.architecture.position_variables
+        program_counter = start
+        end = len(self.program)
+        last = None
+        while program_counter < end:
+            last = self.program[program_counter]
+            code = self.translate_instruction(last, program_counter, constants)
+            if not last.error:
+                bindings.update((position, position in position_variables)
+                                for position in self.memory_operands(last))
+            lines.extend("    " + line for line in code)
+            line_program_counters.extend([program_counter] * len(code))
+            program_counter += 1
+            if code[-1].startswith(("return", "raise")) or last.op_code in TERMINATORS:
+                break
+            if program_counter in self.leaders or program_counter - start >= MAX_BLOCK_LENGTH:
+                lines.append(f"    return {program_counter}")
+                line_program_counters.append(program_counter)
+                break
+        else:
+            lines.append(f"    return {program_counter}")
+            line_program_counters.append(program_counter)
+
+        source = "\n".join(lines) + "\n"
+        exec(compile(source, f"<block {start}>", "exec"), constants)
+        return Block(start, program_counter - start, constants[f"block_{start}"], line_program_counters,
+                     last is not None and last.op_code == "HLT" and not last.error, source, tuple(bindings),
+                     self.architecture.binding_generation)
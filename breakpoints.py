@@ -0,0 +1,193 @@
+"""
+Breakpoints and watchpoints of the quiet execution
+
+    - breakpoint: stop before the instruction at a program counter, optionally only if a condition is true
+    - condition without program counter: stop before any instruction when it is true
+    - memory watchpoint: stop after an instruction changed a memory position (or the position of a variable)
+    - stack watchpoint: stop after an instruction made the stack reach a depth
+
+The execution loop only looks up the program counter in a set for the breakpoints and only checks the watchpoints if
+there is at least one, see Architecture.execute_quiet_program. A run starting on the breakpoint it stopped on does not
+stop again, so the execution can be continued.
+
+Text form (comma separated, see parse):
+    12              breakpoint at PC 12
+    12 if t0 == 5   breakpoint at PC 12 if t0 is 5 (register or variable name)
+    if abc == 5     stop when the variable abc is 5
+    watch abc       watch the memory position of the variable abc (or a memory position: watch 3)
+    stack 4         stop when the stack depth reaches 4
+"""
+import re
+
+from machine_state import REGISTER_INDEX
+
+BREAKPOINT = re.compile(r'(\d*)\s*(?:\bif\s+(\w+)\s*==\s*(\d+))?')  # PC, register or variable name, value
+
+
+class Breakpoints:
+    def __init__(self):
+        self.program_counters = set()  # Program counters with a breakpoint (with or without condition)
+        self.conditions = {}  # Program counter (None for any) -> [(register or variable name, value) or None (always)]
+        self.watched_memory = set()  # Memory positions and variable names
+        self.stack_depth = None  # Stack depth to stop at, None if not watched
+        self.hit = None  # Description of the last breakpoint or watchpoint reached
+        self.resume_program_counter = None  # Breakpoint to go past when the execution is continued
+        self.watched_values = {}  # Memory position -> value before the instruction
+        self.binding_generation = None  # Architecture.binding_generation of the variable positions in watched_values
+        self.stack_size = 0  # Stack depth before the instruction
+
+    def add_breakpoint(self, program_counter, condition=None):
+        """
+        :param program_counter: Program counter to stop at, None to check the condition before every instruction
+        :param condition: (register or variable name, value) to stop only if the register or variable is equal to
+        the value, None to always stop
+        """
+        if condition is None and program_counter is None:
+            raise ValueError("A breakpoint without program counter needs a condition")
+        self.conditions.setdefault(program_counter, []).append(condition)
+        if program_counter is not None:
+            self.program_counters.add(program_counter)
+
+    def remove_breakpoint(self, program_counter):
+        """
+        Remove the breakpoint and the conditions of a program counter
+        :param program_counter: Program counter of the breakpoint, None for the conditions without program counter
+        """
+        self.program_counters.discard(program_counter)
+        self.conditions.pop(program_counter, None)
+
+    def watch_memory(self, location):
+        """
+        :param location: Memory position or variable name (its position is taken again after every VAD/VDE)
+        """
+        self.watched_memory.add(location)
+
+    def watch_stack(self, depth):
+        """
+        :param depth: Stack depth to stop at
+        """
+        self.stack_depth = depth
+
+    def clear(self):
+        """
+        Remove all the breakpoints and watchpoints, the breakpoint to go past is kept
+        """
+        self.program_counters.clear()
+        self.conditions.clear()
+        self.watched_memory.clear()
+        self.stack_depth = None
+
+    def parse(self, text):
+        """
+        Add the breakpoints and watchpoints of a text (see the module documentation)
+        :param text: Comma separated breakpoints and watchpoints
+        """
+        for item in text.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            words = item.split(None, 1)
+            if words[0] == "watch" and len(words) == 2:
+                location = words[1].strip()
+                self.watch_memory(int(location) if location.isdigit() else location)
+            elif words[0] == "stack" and len(words) == 2 and words[1].strip().isdigit():
+                self.watch_stack(int(words[1]))
+            else:
+                match = BREAKPOINT.fullmatch(item)
+                if match is None:
+                    raise ValueError(f"Invalid breakpoint: {item}")
+                program_counter, name, value = match.groups()
+                self.add_breakpoint(int(program_counter) if program_counter else None,
+                                    (name, int(value)) if name else None)
+
+    def active(self):
+        """
+        :return: True if there is a breakpoint or a watchpoint, otherwise the execution does not need to check them
+        """
+        return bool(self.program_counters) or bool(self.conditions) or self.watching()
+
+    def watching(self):
+        """
+        :return: True if a watchpoint has to be checked after every instruction
+        """
+        return bool(self.watched_memory) or self.stack_depth is not None
+
+    def start(self, architecture):
+        """
+        Prepare an execution
+        :param architecture: Architecture to execute
+        :return: Program counter whose breakpoint is ignored (the one the execution stopped on), None if there is none
+        """
+        self.hit = None
+        self.watched_values = {}
+        self.resolve(architecture)
+        self.stack_size = len(architecture.stack_words)
+        resume, self.resume_program_counter = self.resume_program_counter, None
+        return resume if resume == architecture.program_counter else None
+
+    def resolve(self, architecture):
+        """
+        Take the memory positions of the watched variables, a position which was not watched yet starts from its
+        current value
+        :param architecture: Architecture
+        """
+        watched_values = {}
+        for location in self.watched_memory:
+            position = architecture.variable_positions.get(location) if isinstance(location, str) else location
+            if position is not None:
+                watched_values[position] = self.watched_values.get(position, architecture.memory_words[position])
+        self.watched_values = watched_values
+        self.binding_generation = architecture.binding_generation
+
+    def value(self, architecture, name):
+        """
+        :param architecture: Architecture
+        :param name: Register or variable name
+        :return: Value of the register or the variable, None if there is no such variable
+        """
+        if name in REGISTER_INDEX:
+            return architecture.register_words[REGISTER_INDEX[name]]
+        position = architecture.variable_positions.get(name)
+        return None if position is None else architecture.memory_words[position]
+
+    def check_before(self, architecture, program_counter):
+        """
+        Check the breakpoints before executing an instruction
+        :param architecture: Architecture
+        :param program_counter: Program counter of the instruction
+        :return: True if the execution has to stop
+        """
+        for location in (program_counter, None):
+            if location is not None and location not in self.program_counters:
+                continue
+            for condition in self.conditions.get(location, ()):
+                if condition is None:
+                    self.hit = f"Breakpoint at PC {program_counter}"
+                elif self.value(architecture, condition[0]) == condition[1]:
+                    self.hit = f"Breakpoint at PC {program_counter}: {condition[0]} == {condition[1]}"
+                else:
+                    continue
+                self.resume_program_counter = program_counter
+                return True
+        return False
+
+    def check_after(self, architecture):
+        """
+        Check the watchpoints after executing an instruction
+        :param architecture: Architecture
+        :return: True if the execution has to stop
+        """
+        if architecture.binding_generation != self.binding_generation:
+            self.resolve(architecture)
+        memory = architecture.memory_words
+        for position, old in self.watched_values.items():
+            if memory[position] != old:
+                self.watched_values[position] = memory[position]
+                self.hit = f"Watchpoint: memory {position} changed from {old} to {memory[position]}"
+                return True
+        if self.stack_depth is not None and len(architecture.stack_words) != self.stack_size:
+            self.stack_size = len(architecture.stack_words)
+            if self.stack_size == self.stack_depth:
+                self.hit = f"Watchpoint: stack depth {self.stack_depth}"
+                return True
+        return False
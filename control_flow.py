@@ -0,0 +1,190 @@
+"""
+Static control-flow graph of a decoded program
+
+A taken branch (BEQ/BNE/BBG/BSM/JMP) sets the program counter to its label, then the program counter is incremented:
+the target of a branch is label + 1. A conditional branch also falls through to the next instruction, HLT and the
+instructions with a decoding error (raised on execution) have no successor. A successor equal to the program length is
+the normal end of the program; a branch target past it is invalid (see invalid_branches).
+
+The basic blocks start at the first instruction, at the branch targets and after every branch, HLT or invalid
+instruction. Reachability, loops (natural loops of the back edges found by a depth-first search from the first block)
+and unreachable code are computed on demand.
+
+Usage: python control_flow.py <program file>
+"""
+import argparse
+
+from instructions import decode_word
+from program_format import read_program
+
+BRANCHES = ("BEQ", "BNE", "BBG", "BSM")
+
+
+def invalid_branches(memory_code):
+    """
+    :param memory_code: Decoded program (list of DecodedInstruction)
+    :return: Iterator of (program counter, target) of the branches past the end of the program
+    """
+    end = len(memory_code)
+    for program_counter, instruction in enumerate(memory_code):
+        if (instruction.error is None and (instruction.op_code == "JMP" or instruction.op_code in BRANCHES)
+                and instruction.label + 1 > end):
+            yield program_counter, instruction.label + 1
+
+
+class ControlFlowGraph:
+    def __init__(self, memory_code):
+        """
+        :param memory_code: Decoded program (list of DecodedInstruction)
+        """
+        self.memory_code = memory_code
+        end = len(memory_code)
+        self.invalid_branches = list(invalid_branches(memory_code))  # (program counter, target) past the end
+        self.leaders = {0} if end else set()  # Program counters where a basic block starts
+        for program_counter, instruction in enumerate(memory_code):
+            op_code = instruction.op_code
+            if instruction.error is not None or op_code == "HLT":
+                self.leaders.add(program_counter + 1)
+            elif op_code == "JMP" or op_code in BRANCHES:
+                self.leaders.add(program_counter + 1)
+                self.leaders.add(instruction.label + 1)
+        self.leaders = {leader for leader in self.leaders if leader < end}
+
+        # Basic blocks: first program counter -> last program counter (included), and successors of each block
+        # (first program counters of the blocks which can follow it, the end of the program included)
+        self.blocks = {}
+        self.successors = {}
+        starts = sorted(self.leaders)
+        for start, next_start in zip(starts, starts[1:] + [end]):
+            last = next_start - 1
+            self.blocks[start] = last
+            instruction = memory_code[last]
+            op_code = instruction.op_code
+            if instruction.error is not None or op_code == "HLT":
+                successors = ()
+            elif op_code == "JMP":
+                successors = (instruction.label + 1,)
+            elif op_code in BRANCHES:
+                successors = (last + 1, instruction.label + 1)
+            else:
+                successors = (last + 1,)
+            self.successors[start] = tuple(sorted({target for target in successors if target <= end}))
+
+    def block_successors(self, start):
+        """
+        :param start: First program counter of a basic block
+        :return: First program counters of the blocks which can follow it (the end of the program excluded)
+        """
+        end = len(self.memory_code)
+        return [target for target in self.successors[start] if target < end]
+
+    def ends(self, start):
+        """
+        :param start: First program counter of a basic block
+        :return: True if the program can halt after the block (HLT, end of the program or decoding error)
+        """
+        successors = self.successors[start]
+        return not successors or len(self.memory_code) in successors
+
+    def reachable_blocks(self):
+        """
+        :return: First program counters of the basic blocks reachable from the first instruction
+        """
+        if not self.blocks:
+            return set()
+        reached = {0}
+        pending = [0]
+        while pending:
+            for successor in self.block_successors(pending.pop()):
+                if successor not in reached:
+                    reached.add(successor)
+                    pending.append(successor)
+        return reached
+
+    def unreachable_code(self):
+        """
+        :return: (first, last) program counters of the ranges of instructions which can never be executed
+        """
+        reached = self.reachable_blocks()
+        ranges = []
+        for start in sorted(self.blocks):
+            if start in reached:
+                continue
+            if ranges and ranges[-1][1] == start - 1:
+                ranges[-1] = (ranges[-1][0], self.blocks[start])
+            else:
+                ranges.append((start, self.blocks[start]))
+        return ranges
+
+    def loops(self):
+        """
+        Natural loops of the back edges found by a depth-first search from the first block
+        :return: Dictionary header block -> sorted first program counters of the blocks of the loop
+        """
+        if not self.blocks:
+            return {}
+        back_edges = []
+        state = {0: 1}  # Block -> 1 while on the search path, 2 once finished
+        path = [(0, iter(self.block_successors(0)))]
+        while path:
+            block, successors = path[-1]
+            for successor in successors:
+                if state.get(successor) == 1:
+                    back_edges.append((block, successor))
+                elif successor not in state:
+                    state[successor] = 1
+                    path.append((successor, iter(self.block_successors(successor))))
+                    break
+            else:
+                state[block] = 2
+                path.pop()
+
+        predecessors = {}
+        for block in self.blocks:
+            for successor in self.block_successors(block):
+                predecessors.setdefault(successor, []).append(block)
+        loops = {}
+        for latch, header in back_edges:
+            body = loops.setdefault(header, {header})
+            pending = [latch]
+            while pending:
+                block = pending.pop()
+                if block not in body:
+                    body.add(block)
+                    pending.extend(predecessors.get(block, ()))
+        return {header: sorted(body) for header, body in sorted(loops.items())}
+
+    def report(self):
+        """
+        :return: Dictionary of the graph, JSON serializable
+        """
+        return {
+            'instructions': len(self.memory_code),
+            'blocks': {start: {'end': last, 'successors': self.block_successors(start), 'halts': self.ends(start)}
+                       for start, last in sorted(self.blocks.items())},
+            'loops': self.loops(),
+            'unreachable': self.unreachable_code(),
+            'invalid_branches': self.invalid_branches,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Control-flow graph, loops and unreachable code of a program")
+    parser.add_argument("program")
+    args = parser.parse_args()
+
+    graph = ControlFlowGraph([decode_word(word) for word in read_program(args.program)])
+    report = graph.report()
+    for start, block in report['blocks'].items():
+        successors = ", ".join(map(str, block['successors'])) or "-"
+        print(f"block {start}-{block['end']}: successors {successors}" + (", may halt" if block['halts'] else ""))
+    for header, body in report['loops'].items():
+        print(f"loop at {header}: blocks {', '.join(map(str, body))}")
+    for first, last in report['unreachable']:
+        print(f"unreachable: {first}-{last}")
+    for program_counter, target in report['invalid_branches']:
+        print(f"invalid branch: {program_counter} -> {target} (program of {report['instructions']} instructions)")
+
+
+if __name__ == "__main__":
+    main()
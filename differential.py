@@ -0,0 +1,190 @@
+"""
+Lockstep differential execution of a program in two engines
+
+Both engines run the same program by chunks of interval instructions (instruction limit of execute_program) and their
+states are compared through a digest after every chunk. When a chunk ends with different states or halt reasons, both
+architectures go back to their snapshot of the start of the chunk (see snapshot.py) and the chunk is bisected to the
+first instruction count where they differ. The block engine executes the end of a block which does not fit in the
+instruction limit with the interpreter, so inside a translated block the divergence is found at the end of the block.
+
+Usage: python differential.py <program file>... [--engines ENGINE ENGINE] [--interval N] [--max-instructions N]
+"""
+import argparse
+import hashlib
+import sys
+
+from Assembly import Architecture
+from execution import HALT_INSTRUCTION_LIMIT
+
+ENGINES = ("interpreter", "block")  # Reference engine first
+INTERVAL = 10_000  # Instructions executed between two digest comparisons
+MAX_INSTRUCTIONS = 10_000_000  # Default instruction limit of a program
+
+
+def state_digest(architecture):
+    """
+    :param architecture: Architecture
+    :return: Digest of the program counter, registers, memory, variables and stack
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(architecture.memory_words.tobytes())
+    digest.update(repr((architecture.program_counter, architecture.register_words, architecture.stack_words,
+                        sorted(architecture.variable_positions.items()))).encode())
+    return digest.digest()
+
+
+class Divergence:
+    """
+    First point where two engines differ
+    """
+    __slots__ = ('instruction_count', 'program_counter', 'differences')
+
+    def __init__(self, instruction_count, program_counter, differences):
+        """
+        :param instruction_count: Number of instructions executed when the states first differ
+        :param program_counter: Program counter of the reference engine before the last of these instructions
+        :param differences: Dictionary field -> (value in the first engine, value in the second engine)
+        """
+        self.instruction_count = instruction_count
+        self.program_counter = program_counter
+        self.differences = differences
+
+    def __repr__(self):
+        differences = ", ".join(f"{field}: {first} != {second}" for field, (first, second) in self.differences.items())
+        return f"Divergence after {self.instruction_count} instructions (PC {self.program_counter}): {differences}"
+
+
+class DifferentialRunner:
+    def __init__(self, file_path, engines=ENGINES, interval=INTERVAL):
+        """
+        :param file_path: Path of the program
+        :param engines: The two engines to compare, the reference first
+        :param interval: Instructions executed between two digest comparisons
+        """
+        self.engines = engines
+        self.interval = interval
+        self.architectures = []
+        for _ in engines:
+            architecture = Architecture()
+            architecture.fetch_data(file_path)
+            self.architectures.append(architecture)
+        self.instruction_count = 0
+
+    def execute(self, max_instructions):
+        """
+        Run both engines the same number of instructions from their current state
+        :param max_instructions: Number of instructions
+        :return: List of the ExecutionResult of each engine
+        """
+        return [architecture.execute_program("quiet", engine, max_instructions=max_instructions)
+                for architecture, engine in zip(self.architectures, self.engines)]
+
+    def same(self, results):
+        """
+        :param results: ExecutionResult of each engine
+        :return: True if the engines halted the same way with the same state
+        """
+        first, second = results
+        return ((first.halt_reason, first.instruction_count, first.error)
+                == (second.halt_reason, second.instruction_count, second.error)
+                and state_digest(self.architectures[0]) == state_digest(self.architectures[1]))
+
+    def differences(self, results):
+        """
+        :param results: ExecutionResult of each engine
+        :return: Dictionary field -> (value in the first engine, value in the second engine) of the fields which differ
+        """
+        first, second = (result.to_dict() for result in results)
+        return {field: (first[field], second[field]) for field in first if first[field] != second[field]}
+
+    def bisect(self, snapshots, count):
+        """
+        Find the first instruction count of a chunk where the engines differ
+        :param snapshots: Snapshot of each architecture at the start of the chunk
+        :param count: Instruction count of the chunk where they differ
+        :return: Divergence
+        """
+        low, high = 0, count  # The engines match after low instructions and differ after high instructions
+        while high - low > 1:
+            middle = (low + high) // 2
+            for architecture, snapshot in zip(self.architectures, snapshots):
+                architecture.restore_snapshot(snapshot)
+            if self.same(self.execute(middle)):
+                low = middle
+            else:
+                high = middle
+
+        for architecture, snapshot in zip(self.architectures, snapshots):
+            architecture.restore_snapshot(snapshot)
+        program_counter = self.architectures[0].program_counter
+        if low:
+            self.execute(low)
+            program_counter = self.architectures[0].program_counter
+            for architecture, snapshot in zip(self.architectures, snapshots):
+                architecture.restore_snapshot(snapshot)
+        # Executed again in one run: split at low, the block engine would leave the end of the block to the interpreter
+        results = self.execute(high)
+        return Divergence(self.instruction_count + high, program_counter, self.differences(results))
+
+    def run(self, max_instructions=MAX_INSTRUCTIONS):
+        """
+        Execute the program in both engines until it halts, they differ or max_instructions instructions were executed
+        :param max_instructions: Maximum number of instructions, None for no limit
+        :return: Divergence, None if the engines matched
+        """
+        while max_instructions is None or self.instruction_count < max_instructions:
+            chunk = self.interval
+            if max_instructions is not None:
+                chunk = min(chunk, max_instructions - self.instruction_count)
+            snapshots = [architecture.take_snapshot() for architecture in self.architectures]
+            results = self.execute(chunk)
+            if not self.same(results):
+                return self.bisect(snapshots, max(result.instruction_count for result in results) or 1)
+            self.instruction_count += results[0].instruction_count
+            if results[0].halt_reason != HALT_INSTRUCTION_LIMIT:
+                break
+        return None
+
+
+def compare_engines(file_path, engines=ENGINES, interval=INTERVAL, max_instructions=MAX_INSTRUCTIONS):
+    """
+    :param file_path: Path of the program
+    :param engines: The two engines to compare, the reference first
+    :param interval: Instructions executed between two digest comparisons
+    :param max_instructions: Maximum number of instructions, None for no limit
+    :return: (Divergence or None if the engines matched, number of instructions compared)
+    """
+    runner = DifferentialRunner(file_path, engines, interval)
+    divergence = runner.run(max_instructions)
+    return divergence, runner.instruction_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Execute programs in two engines and find where they diverge")
+    parser.add_argument("programs", nargs="+")
+    parser.add_argument("--engines", nargs=2, choices=ENGINES, default=list(ENGINES),
+                        help="engines to compare, the reference first")
+    parser.add_argument("--interval", type=int, default=INTERVAL, help="instructions between two comparisons")
+    parser.add_argument("--max-instructions", type=int, default=MAX_INSTRUCTIONS,
+                        help="instruction limit of a program (0 for no limit)")
+    args = parser.parse_args()
+
+    diverged = 0
+    for file_path in args.programs:
+        try:
+            divergence, count = compare_engines(file_path, args.engines, args.interval, args.max_instructions or None)
+        except (ValueError, OverflowError, FileNotFoundError) as e:
+            diverged += 1
+            print(f"{file_path}: not loaded ({type(e).__name__}: {e})")
+            continue
+        if divergence is None:
+            print(f"{file_path}: match ({count} instructions)")
+        else:
+            diverged += 1
+            print(f"{file_path}: {divergence}")
+    if diverged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Cache of the disassembled instructions of a program, for the listing and the "Next Instruction" field of the GUI
+
+The text of an instruction only changes when one of its memory operands gets or loses a variable name, so it is cached
+by program counter with the binding generation it was made with (Architecture.binding_generation, changed by VAD and
+VDE). An instruction without memory operand is cached once for all generations.
+"""
+
+
+class DisassemblyCache:
+    def __init__(self, architecture):
+        """
+        :param architecture: Architecture whose program is disassembled
+        """
+        self.architecture = architecture
+        self.lines = {}  # Program counter -> (binding generation, None if independent of the bindings, text)
+
+    def clear(self):
+        """
+        Drop the cached texts, to call when another program is loaded
+        """
+        self.lines.clear()
+
+    def get(self, program_counter):
+        """
+        :param program_counter: Program counter of the instruction
+        :return: Human-readable instruction (see Instruction.disassemble)
+        """
+        architecture = self.architecture
+        entry = self.lines.get(program_counter)
+        if entry is not None and (entry[0] is None or entry[0] == architecture.binding_generation):
+            return entry[1]
+
+        instruction = architecture.memory_code[program_counter]
+        text = architecture.instruction.disassemble(instruction)
+        uses_memory = "memory" in (instruction.param_type_1, instruction.param_type_2)
+        self.lines[program_counter] = (architecture.binding_generation if uses_memory else None, text)
+        return text
@@ -0,0 +1,91 @@
+"""
+Result of an execution, shared by the execution engines (Architecture interpreter and BlockEngine), and changes of the
+state reported to the listeners of an Architecture
+"""
+from machine_state import REGISTER_NAMES
+
+# Halt reasons of an execution
+HALT_HLT = "HLT"  # HLT instruction executed
+HALT_END_OF_PROGRAM = "END_OF_PROGRAM"  # Program counter went past the last instruction
+HALT_ERROR = "ERROR"  # An instruction raised an error
+HALT_INSTRUCTION_LIMIT = "INSTRUCTION_LIMIT"  # max_instructions instructions were executed
+HALT_TIME_LIMIT = "TIME_LIMIT"  # time_limit seconds went by
+HALT_BREAKPOINT = "BREAKPOINT"  # A breakpoint was reached, see breakpoints.py
+HALT_WATCHPOINT = "WATCHPOINT"  # A watched memory position or stack depth changed
+
+CHECK_INTERVAL = 1024  # Instructions executed between two checks of the time limit
+
+# Kinds of state change
+CHANGE_REGISTER = "register"  # location: register index
+CHANGE_MEMORY = "memory"  # location: memory position
+CHANGE_PUSH = "push"  # location: index of the new top of the stack, new: pushed value
+CHANGE_POP = "pop"  # location: index of the popped value, old: popped value
+CHANGE_BIND = "bind"  # location: memory position, new: name of the variable added
+CHANGE_UNBIND = "unbind"  # location: memory position, old: name of the variable removed
+CHANGE_PC = "pc"  # location: None
+
+
+class ExecutionResult:
+    """
+    Result of a quiet execution: why it stopped, how many instructions were executed and the final state
+    After a limit (HALT_INSTRUCTION_LIMIT or HALT_TIME_LIMIT), a breakpoint or a watchpoint, program_counter is the
+    next instruction to execute
+    """
+    __slots__ = ('halt_reason', 'instruction_count', 'error', 'program_counter', 'registers', 'variables',
+                 'variable_positions', 'memory', 'stack')
+
+    def __init__(self, architecture, halt_reason, instruction_count, error=None):
+        """
+        :param architecture: Architecture to take the final state from
+        :param halt_reason: Why the execution stopped (HALT_* constant)
+        :param instruction_count: Number of executed instructions
+        :param error: Error that stopped the execution, None if there is none
+        """
+        self.halt_reason = halt_reason
+        self.instruction_count = instruction_count
+        self.error = error
+        self.program_counter = architecture.program_counter
+        self.registers = dict(zip(REGISTER_NAMES, architecture.register_words))
+        self.variable_positions = dict(architecture.variable_positions)
+        self.variables = {name: architecture.memory_words[position]
+                          for name, position in self.variable_positions.items()}
+        self.memory = architecture.memory_words.tolist()
+        self.stack = list(architecture.stack_words)
+
+    def __repr__(self):
+        return (f"ExecutionResult(halt_reason={self.halt_reason!r}, instruction_count={self.instruction_count}, "
+                f"error={self.error!r}, program_counter={self.program_counter}, registers={self.registers}, "
+                f"variables={self.variables}, stack={self.stack})")
+
+    def to_dict(self):
+        """
+        :return: Dictionary of the result, JSON serializable
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class StateChange:
+    """
+    Change of the state made by an instruction
+    """
+    __slots__ = ('kind', 'location', 'old', 'new')
+
+    def __init__(self, kind, location, old, new):
+        """
+        :param kind: Kind of change (CHANGE_* constant)
+        :param location: Register index, memory position or stack index (see the CHANGE_* constants)
+        :param old: Value before the instruction, None if there was none
+        :param new: Value after the instruction, None if there is none
+        """
+        self.kind = kind
+        self.location = location
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        return f"StateChange({self.kind!r}, {self.location!r}, {self.old!r}, {self.new!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, StateChange):
+            return NotImplemented
+        return (self.kind, self.location, self.old, self.new) == (other.kind, other.location, other.old, other.new)
@@ -0,0 +1,220 @@
+"""
+Binary execution trace: one fixed-width record per executed instruction
+
+Record (25 bytes, little-endian, see RECORD):
+    program_counter, next_program_counter   PC of the instruction and PC after it (shows the branches taken)
+    word                                     32-bit instruction
+    value_1, value_2                         values of the operands before the instruction (NONE if not a value)
+    change, location, old, new               first state change of the instruction (CHANGE_KINDS index, 0 if none)
+    stack_depth                              stack depth after the instruction
+The file starts with a header (magic, version, record size). The records are buffered and written every
+flush_records records, so the trace of a run stopped by a limit or an error is complete up to the last flush.
+Instructions which raise an error are not recorded.
+
+Usage: python execution_trace.py record <program file> <trace file> [--max-instructions N]
+       python execution_trace.py show <trace file> [--start N] [--count N]
+       python execution_trace.py diff <trace file> <trace file>
+"""
+import argparse
+import struct
+import sys
+from collections import namedtuple
+from itertools import zip_longest
+
+from execution import (CHANGE_BIND, CHANGE_MEMORY, CHANGE_PC, CHANGE_POP, CHANGE_PUSH, CHANGE_REGISTER,
+                       CHANGE_UNBIND)
+from instructions import OP_CODES_BY_VALUE, OPERAND_TYPES
+from machine_state import MEMORY_SIZE, REGISTER_NAMES
+
+MAGIC = b"M7TR"
+VERSION = 2  # 2: 32-bit program counters
+HEADER = struct.Struct('<4sBB')  # Magic, version, record size
+RECORD = struct.Struct('<IIIHHBHHHH')
+NONE = 0xFFFF  # Value of a field which does not apply
+CHANGE_KINDS = (None, CHANGE_REGISTER, CHANGE_MEMORY, CHANGE_PUSH, CHANGE_POP, CHANGE_BIND, CHANGE_UNBIND)
+CHANGE_CODES = {kind: code for code, kind in enumerate(CHANGE_KINDS)}
+FLUSH_RECORDS = 4096  # Records buffered between two writes to the file
+READ_RECORDS = 4096  # Records read from the file at once
+
+TraceRecord = namedtuple('TraceRecord', ('program_counter', 'next_program_counter', 'word', 'value_1', 'value_2',
+                                         'change', 'location', 'old', 'new', 'stack_depth'))
+
+
+class TraceWriter:
+    def __init__(self, file_path, flush_records=FLUSH_RECORDS):
+        """
+        :param file_path: Trace file to write
+        :param flush_records: Number of records buffered between two writes to the file
+        """
+        self.file = open(file_path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self.flush_records = flush_records
+        self.buffer = bytearray()
+        self.pending = 0  # Records in the buffer
+        self.count = 0  # Records written or buffered
+
+    def operand_value(self, architecture, param_type, operand, change):
+        """
+        :param architecture: Architecture after the instruction
+        :param param_type: Type of the operand
+        :param operand: Resolved operand
+        :param change: First state change of the instruction, None if there is none
+        :return: Value of the operand before the instruction, NONE if the operand is not a value
+        """
+        if param_type == "register":
+            if operand >= len(REGISTER_NAMES):
+                return NONE
+            if change is not None and change.kind == CHANGE_REGISTER and change.location == operand:
+                return change.old
+            return architecture.register_words[operand]
+        if param_type == "memory":
+            if operand >= MEMORY_SIZE:
+                return NONE
+            if change is not None and change.kind == CHANGE_MEMORY and change.location == operand:
+                return change.old
+            return architecture.memory_words[operand]
+        if param_type in ("constant", "label") and operand < NONE:
+            return operand
+        return NONE
+
+    def record(self, architecture, program_counter, instruction, changes):
+        """
+        Add the record of an executed instruction
+        :param architecture: Architecture after the instruction
+        :param program_counter: Program counter of the instruction
+        :param instruction: Executed instruction
+        :param changes: StateChange list of the instruction, ending with its program counter change
+        """
+        change = changes[0] if changes[0].kind != CHANGE_PC else None
+        value_1 = value_2 = NONE
+        if instruction.op_code != "VAD" and instruction.op_code != "VDE":  # Their operands hold the variable name
+            types_1, types_2 = OPERAND_TYPES[instruction.op_code]
+            if types_1 is not None:
+                value_1 = self.operand_value(architecture, instruction.param_type_1, instruction.operand_1, change)
+            if types_2 is not None:
+                value_2 = self.operand_value(architecture, instruction.param_type_2, instruction.operand_2, change)
+        if change is None:
+            kind, location, old, new = 0, NONE, NONE, NONE
+        else:
+            kind, location = CHANGE_CODES[change.kind], change.location
+            old = change.old if isinstance(change.old, int) else NONE
+            new = change.new if isinstance(change.new, int) else NONE
+        self.buffer += RECORD.pack(program_counter, architecture.program_counter, instruction.word, value_1, value_2,
+                                   kind, location, old, new, len(architecture.stack_words))
+        self.count += 1
+        self.pending += 1
+        if self.pending >= self.flush_records:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered records to the file
+        """
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_trace(file_path):
+    """
+    Iterate over the records of a trace file
+    :param file_path: Trace file
+    :return: Iterator of TraceRecord
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size or HEADER.unpack(header)[0] != MAGIC:
+            raise ValueError(f"{file_path} is not a trace file")
+        _, version, record_size = HEADER.unpack(header)
+        if version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"Unsupported trace version {version}")
+        while True:
+            data = f.read(READ_RECORDS * RECORD.size)
+            if not data:
+                break
+            data = data[:len(data) - len(data) % RECORD.size]  # Ignore a record cut by a crash
+            for fields in RECORD.iter_unpack(data):
+                yield TraceRecord(*fields)
+
+
+def diff_traces(file_path_1, file_path_2):
+    """
+    Find where two runs diverge
+    :param file_path_1: First trace file
+    :param file_path_2: Second trace file
+    :return: (index, record of the first trace, record of the second trace) of the first different record, the
+    record of the shorter trace is None; None if the traces are identical
+    """
+    for index, (record_1, record_2) in enumerate(zip_longest(read_trace(file_path_1), read_trace(file_path_2))):
+        if record_1 != record_2:
+            return index, record_1, record_2
+    return None
+
+
+def format_record(record):
+    """
+    :param record: TraceRecord
+    :return: One-line text of the record
+    """
+    if record is None:
+        return "(end of trace)"
+    op_code = OP_CODES_BY_VALUE.get(record.word >> 27, "?")
+    values = " ".join("-" if value == NONE else str(value) for value in (record.value_1, record.value_2))
+    text = f"{record.program_counter:>5} -> {record.next_program_counter:<5} {op_code:<5} {values:<9}"
+    if record.change:
+        old = "-" if record.old == NONE else record.old
+        new = "-" if record.new == NONE else record.new
+        text += f" {CHANGE_KINDS[record.change]} {record.location}: {old} -> {new}"
+    return text + f" (stack {record.stack_depth})"
+
+
+def main():
+    from Assembly import Architecture
+
+    parser = argparse.ArgumentParser(description="Record, show and compare binary execution traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="execute a program and write its trace")
+    record.add_argument("program")
+    record.add_argument("trace")
+    record.add_argument("--max-instructions", type=int, help="instruction limit")
+    show = commands.add_parser("show", help="print the records of a trace")
+    show.add_argument("trace")
+    show.add_argument("--start", type=int, default=0, help="index of the first record")
+    show.add_argument("--count", type=int, default=100, help="number of records")
+    diff = commands.add_parser("diff", help="find the first record where two traces differ")
+    diff.add_argument("traces", nargs=2)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        architecture = Architecture()
+        architecture.fetch_data(args.program)
+        writer = architecture.start_trace(args.trace)
+        result = architecture.execute_program("quiet", max_instructions=args.max_instructions)
+        architecture.stop_trace()
+        print(f"Halt reason: {result.halt_reason}" + (f" ({result.error})" if result.error else ""))
+        print(f"{writer.count} records, {RECORD.size} bytes each")
+    elif args.command == "show":
+        for index, trace_record in enumerate(read_trace(args.trace)):
+            if index >= args.start + args.count:
+                break
+            if index >= args.start:
+                print(f"{index:>8} {format_record(trace_record)}")
+    else:
+        divergence = diff_traces(*args.traces)
+        if divergence is None:
+            print("Identical traces")
+        else:
+            index, record_1, record_2 = divergence
+            print(f"First difference at record {index}:")
+            print(f"  {args.traces[0]}: {format_record(record_1)}")
+            print(f"  {args.traces[1]}: {format_record(record_2)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
+from assembler import assemble, is_assembly_source
+
+BLOCK_SIZE = 1 << 16  # Characters read at once by iter_words
+NOT_BINARY = str.maketrans('', '', '01\n')  # Deletes the valid characters, anything left is invalid
+
+
 def load_file(file_path):
     """
     Load the file and verify that it is a valid file
-    File must store binary content (only 0 and 1) and can be divided into 32-bit chunks
+    File must store binary content (only 0 and 1) and can be divided into 32-bit chunks, or be a mnemonic source
+    (#DATA/#CODE, see assembler.py) which is assembled
     :param file_path: Path of the file to load
     :return: Content of the file
     """
@@ -12,10 +19,9 @@ def load_file(file_path):
         raise FileNotFoundError(f'File {file_path} not found')
 
     # Verify that the file is a valid file: only 0 and 1
-    if not all(c in ['0', '1', '\n'] for c in content):
-        # if all(c in ['#CODE', '#DATA'] for c in content):
-        #    content = translate_code_to_binary(file_path)
-        # else:
+    if content.translate(NOT_BINARY):
+        if is_assembly_source(content):
+            return ''.join(format(word, '032b') for word in assemble(content))
         raise ValueError(f'File {file_path} is not a valid file (Not only 0 and 1)')
     else:
         content = content.replace('\n', '')
@@ -26,3 +32,42 @@ def load_file(file_path):
             f'File {file_path} is not a valid file (Bits counting is not a multiple of 32: len = {len(content), len(content) % 32})')
 
     return content
+
+
+def iter_words(file_path, block_size=BLOCK_SIZE):
+    """
+    Read the file block by block and yield its 32-bit instructions, without keeping the whole file in memory
+    Same verifications as load_file: only 0 and 1, can be divided into 32-bit chunks
+    :param file_path: Path of the file to load
+    :param block_size: Number of characters read at once
+    :return: Generator of the 32-bit instructions as ints
+    """
+    try:
+        f = open(file_path, 'r')
+    except FileNotFoundError:
+        raise FileNotFoundError(f'File {file_path} not found')
+
+    length = 0
+    with f:
+        pending = ''  # Bits of an instruction split between two blocks
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+
+            # Verify that the block is valid: only 0 and 1
+            if block.translate(NOT_BINARY):
+                raise ValueError(f'File {file_path} is not a valid file (Not only 0 and 1)')
+
+            bits = pending + block.replace('\n', '')
+            end = len(bits) - len(bits) % 32
+            for i in range(0, end, 32):
+                yield int(bits[i:i + 32], 2)
+            pending = bits[end:]
+            length += end
+
+    # Verify that the file is a valid file: can be divided into 32-bit chunks
+    if pending:
+        length += len(pending)
+        raise ValueError(
+            f'File {file_path} is not a valid file (Bits counting is not a multiple of 32: len = {length, length % 32})')
@@ -40,36 +40,172 @@ Bits reading:
 5 - Label
 """
 import re
+from functools import lru_cache
+
+from machine_state import REGISTER_NAMES, STACK_LIMIT, WORD_MASK
+
+OP_CODES = {
+    "00000": "LDA",
+    "00001": "STR",
+    "00010": "PUSH",
+    "00011": "AND",
+    "00100": "OR",
+    "00101": "ADD",
+    "00110": "SUB",
+    "00111": "DIV",
+    "01000": "MUL",
+    "01001": "MOD",
+    "01010": "INC",
+    "01011": "DEC",
+    "01100": "BEQ",
+    "01101": "BNE",
+    "01110": "BBG",
+    "01111": "BSM",
+    "10000": "JMP",
+    "10001": "HLT",
+    "11000": "POP",
+    "11001": "NOT",
+    "11110": "VAD",
+    "11111": "VDE"
+}
+OP_CODES_BY_VALUE = {int(bits, 2): op_code for bits, op_code in OP_CODES.items()}
+
+DECODE_CACHE_SIZE = 1 << 16  # Distinct words kept by decode_word
+
+PARAM_TYPES = ("register", "constant", "memory", "label")  # Indexed by the 2 bits of the type parameter
+
+# Param types allowed for operand 1 and operand 2 of each op code (None if the operand is not used)
+SOURCE_TYPES = ("register", "constant", "memory")
+OPERAND_TYPES = {
+    "LDA": (("register",), SOURCE_TYPES),
+    "STR": (("memory",), ("register", "constant")),
+    "PUSH": (SOURCE_TYPES, None),
+    "AND": (("register",), SOURCE_TYPES),
+    "OR": (("register",), SOURCE_TYPES),
+    "ADD": (("register",), SOURCE_TYPES),
+    "SUB": (("register",), SOURCE_TYPES),
+    "DIV": (("register",), SOURCE_TYPES),
+    "MUL": (("register",), SOURCE_TYPES),
+    "MOD": (("register",), SOURCE_TYPES),
+    "INC": (("register",), None),
+    "DEC": (("register",), None),
+    "BEQ": (SOURCE_TYPES, SOURCE_TYPES),
+    "BNE": (SOURCE_TYPES, SOURCE_TYPES),
+    "BBG": (SOURCE_TYPES, SOURCE_TYPES),
+    "BSM": (SOURCE_TYPES, SOURCE_TYPES),
+    "JMP": (("label",), None),
+    "HLT": (None, None),
+    "POP": (("register",), None),
+    "NOT": (("register",), None),
+    "VAD": (("constant",), ("constant",)),
+    "VDE": (("constant",), ("constant",)),
+}
+
+
+class DecodedInstruction:
+    """
+    Instruction decoded once at load time, with its operands already resolved:
+    register index for a register, int for a constant, memory position for a variable
+    A variable is referred to by its memory position, which stays valid whatever variables are added or removed
+    (see Architecture.binding_generation). The record is immutable, so executing it never modifies the program
+    """
+    __slots__ = ('op_code', 'op_value', 'param_type_1', 'param_type_2', 'operand_1', 'operand_2', 'label',
+                 'variable_name', 'error', 'word')
+
+    def __init__(self, word, op_code, param_type_1, param_type_2, operand_1, operand_2, label, variable_name=None,
+                 error=None):
+        """
+        :param word: 32-bit instruction the record was decoded from
+        :param op_code: Name of the op code (e.g. "ADD")
+        :param param_type_1: Type of operand 1 (register, constant, memory or label)
+        :param param_type_2: Type of operand 2 (register, constant, memory or label)
+        :param operand_1: Resolved operand 1
+        :param operand_2: Resolved operand 2
+        :param label: Line to jump to (PC)
+        :param variable_name: Variable name of VAD/VDE
+        :param error: Error raised when the instruction is executed, None if the instruction is valid
+        """
+        object.__setattr__(self, 'word', word)
+        object.__setattr__(self, 'op_code', op_code)
+        object.__setattr__(self, 'op_value', word >> 27)  # Index in the handler table
+        object.__setattr__(self, 'param_type_1', param_type_1)
+        object.__setattr__(self, 'param_type_2', param_type_2)
+        object.__setattr__(self, 'operand_1', operand_1)
+        object.__setattr__(self, 'operand_2', operand_2)
+        object.__setattr__(self, 'label', label)
+        object.__setattr__(self, 'variable_name', variable_name)
+        object.__setattr__(self, 'error', error)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DecodedInstruction is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("DecodedInstruction is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, DecodedInstruction):
+            return NotImplemented
+        return self.word == other.word
+
+    def __hash__(self):
+        return hash(self.word)
+
+    def __repr__(self):
+        return (f"DecodedInstruction(op_code={self.op_code!r}, param_type_1={self.param_type_1!r}, "
+                f"param_type_2={self.param_type_2!r}, operand_1={self.operand_1}, operand_2={self.operand_2}, "
+                f"label={self.label})")
+
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
+def decode_word(word):
+    """
+    Decode a 32-bit instruction
+    The operands are verified here, an invalid operand is recorded in DecodedInstruction.error and raised on execution
+    Records are immutable, so a word that appears several times in a program is decoded once and shared
+    :param word: 32-bit instruction as an int
+    :return: DecodedInstruction
+    """
+    op_code = OP_CODES_BY_VALUE.get(word >> 27)
+    if op_code is None:
+        raise ValueError("Invalid OP Code")
+
+    param_type_1 = PARAM_TYPES[(word >> 25) & 0b11]
+    param_type_2 = PARAM_TYPES[(word >> 23) & 0b11]
+    operand_1 = (word >> 14) & WORD_MASK
+    operand_2 = (word >> 5) & WORD_MASK
+    label = word & 0b11111
+
+    # Verify parameters, in the same order as the execution would
+    error = None
+    types_1, types_2 = OPERAND_TYPES[op_code]
+    if (types_1 and param_type_1 not in types_1) or (types_2 and param_type_2 not in types_2):
+        error = "Invalid param type"
+    elif types_1 and param_type_1 == "register" and operand_1 >= len(REGISTER_NAMES):
+        error = "Invalid register"
+    elif types_2 and param_type_2 == "register" and operand_2 >= len(REGISTER_NAMES):
+        error = "Invalid register"
+
+    # VAD/VDE: operand 1 (without its 2 first bits) + operand 2 + label is the variable name, 3 ASCII characters of 7 bits
+    variable_name = None
+    if op_code == "VAD" or op_code == "VDE":
+        variable_name = chr((word >> 14) & 0x7F) + chr((word >> 7) & 0x7F) + chr(word & 0x7F)
+        # ASCII must not contain space and special characters
+        if error is None and not re.fullmatch(r'[a-zA-Z]*', variable_name):
+            error = "Invalid variable name"
+
+    return DecodedInstruction(word, op_code, param_type_1, param_type_2, operand_1, operand_2, label, variable_name,
+                              error)
+
 
 class Instruction:
     def __init__(self, architecture):
         self.architecture = architecture
-        self.instructions = {
-            "00000": "LDA",
-            "00001": "STR",
-            "00010": "PUSH",
-            "00011": "AND",
-            "00100": "OR",
-            "00101": "ADD",
-            "00110": "SUB",
-            "00111": "DIV",
-            "01000": "MUL",
-            "01001": "MOD",
-            "01010": "INC",
-            "01011": "DEC",
-            "01100": "BEQ",
-            "01101": "BNE",
-            "01110": "BBG",
-            "01111": "BSM",
-            "10000": "JMP",
-            "10001": "HLT",
-            "11000": "POP",
-            "11001": "NOT",
-            "11110": "VAD",
-            "11111": "VDE"
-        }
-
-        self.instructions = {v: k for k, v in self.instructions.items()}
+        self.instructions = {v: k for k, v in OP_CODES.items()}
+
+        # Handler table indexed by the 5-bit op code value, built once
+        self.handlers = [self.invalid_op_code] * 32
+        for bits, op_code in OP_CODES.items():
+            self.handlers[int(bits, 2)] = getattr(self, op_code)
 
     @staticmethod
     def decode_op_code(string):
@@ -133,52 +269,89 @@ class Instruction:
         raise ValueError("Invalid param type")
 
     def execute_instruction(self, instruction):
-        if instruction['op_code'] in self.instructions:
-            return eval("self." + instruction['op_code'] + "(instruction)")
-        else:
-            raise ValueError("Instruction not found")
-
-    def give_address_memory(self, instruction, param_number):
-        match param_number:
-            case 1:
-                index_param = 'param_type_1'
-                index_operand = 'operand_1'
-            case 2:
-                index_param = 'param_type_2'
-                index_operand = 'operand_2'
-            case _: raise ValueError("Invalid param number")
-
-        if instruction[index_param] == "memory":
-            try:
-                # Get variable name from pointer memory
-                for key, value in self.architecture.ptr_memory.items():
-                    if value == instruction[index_operand] or key == instruction[index_operand]:
-                        instruction[index_operand] = key
-                        return instruction
-            except IndexError:
-                raise ValueError("Invalid memory position")
-            raise ValueError("Invalid memory position: variable not found")
-        raise ValueError("Invalid param type")
+        if instruction.error:
+            self.raise_decoding_error(instruction)
+        return self.handlers[instruction.op_value](instruction)
 
-    def give_address_register(self, instruction, param_number):
-        match param_number:
-            case 1:
-                index_param = 'param_type_1'
-                index_operand = 'operand_1'
-            case 2:
-                index_param = 'param_type_2'
-                index_operand = 'operand_2'
-            case _: raise ValueError("Invalid param number")
-
-        if instruction[index_param] == "register":
-            match instruction[index_operand]:
-                case "000000000" | "t0": instruction[index_operand] = "t0"
-                case "000000001" | "t1": instruction[index_operand] = "t1"
-                case "000000010" | "t2": instruction[index_operand] = "t2"
-                case "000000011" | "t3": instruction[index_operand] = "t3"
-                case _: raise ValueError("Invalid register")
-            return instruction
-        raise ValueError("Invalid param type")
+    def invalid_op_code(self, instruction):
+        raise ValueError("Instruction not found")
+
+    def raise_decoding_error(self, instruction):
+        """
+        Raise the error found when decoding the instruction
+        :param instruction: Instruction with an invalid parameter
+        """
+        # A variable in operand 1 is looked up before an invalid register in operand 2
+        if instruction.error == "Invalid register" and instruction.param_type_1 == "memory":
+            self.give_address_memory(instruction.operand_1)
+        raise ValueError(instruction.error)
+
+    def give_address_memory(self, position):
+        """
+        Verify that a variable is stored at the memory position
+        :param position: Memory position of the variable
+        :return: Memory position of the variable
+        """
+        if position in self.architecture.position_variables:
+            return position
+        raise ValueError("Invalid memory position: variable not found")
+
+    def give_variable_name(self, position):
+        """
+        :param position: Memory position of the variable
+        :return: Name of the variable stored at the memory position, None if there is no variable
+        """
+        return self.architecture.position_variables.get(position)
+
+    def give_value(self, param_type, operand):
+        """
+        Give the value of a register/constant/variable operand
+        :param param_type: Type of the operand
+        :param operand: Resolved operand (register index, constant or memory position)
+        :return: Value of the operand
+        """
+        if param_type == "register":
+            return self.architecture.register_words[operand]
+        if param_type == "constant":
+            return operand
+        return self.architecture.memory_words[self.give_address_memory(operand)]
+
+    def give_operand_text(self, param_type, operand):
+        """
+        :param param_type: Type of the operand
+        :param operand: Resolved operand
+        :return: Human-readable operand (register name, variable name or binary value)
+        """
+        if param_type == "register" and operand < len(REGISTER_NAMES):
+            return REGISTER_NAMES[operand]
+        if param_type == "memory":
+            variable_name = self.give_variable_name(operand)
+            if variable_name is not None:
+                return variable_name
+        return bin(operand)[2:].zfill(9)
+
+    def disassemble(self, instruction):
+        """
+        Translate the instruction into a human-readable format
+        :param instruction: Instruction to translate
+        :return: String containing the translated instruction (e.g. "ADD t0 t1")
+        """
+        match instruction.op_code:
+            case "HLT":
+                return "HLT"
+            case "JMP":
+                return "JMP" + " " + bin(instruction.label)[2:].zfill(5)
+            case "VAD" | "VDE":
+                return instruction.op_code + " " + instruction.variable_name
+        operand_1 = self.give_operand_text(instruction.param_type_1, instruction.operand_1)
+        match instruction.op_code:
+            case "PUSH" | "POP" | "NOT" | "INC" | "DEC":
+                return instruction.op_code + " " + operand_1
+        operand_2 = self.give_operand_text(instruction.param_type_2, instruction.operand_2)
+        match instruction.op_code:
+            case "BEQ" | "BNE" | "BBG" | "BSM":
+                return instruction.op_code + " " + operand_1 + " " + operand_2 + " " + bin(instruction.label)[2:].zfill(5)
+        return instruction.op_code + " " + operand_1 + " " + operand_2
 
     def LDA(self, instruction):
         """
@@ -189,36 +362,8 @@ class Instruction:
         instruction.param_type_2: Source register/constant/variable
         instruction.operand_2: Source register/constant/variable
         """
-        # Select register from param_type_1
-        if instruction['param_type_1'] != "register" or instruction['param_type_2'] == "label":
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
-
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-
-        # Give adress of Source if memory
-        if instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-
         # Execute instruction
-        match instruction['param_type_2']:
-            case "register":
-                if instruction['operand_1'] in self.architecture.registers and instruction['operand_2'] in self.architecture.registers:
-                    self.architecture.registers[instruction['operand_1']] = self.architecture.registers[instruction['operand_2']]
-            case "constant":
-                if instruction['operand_1'] in self.architecture.registers:
-                    self.architecture.registers[instruction['operand_1']] = instruction['operand_2']
-            case "memory":
-                if instruction['operand_1'] in self.architecture.registers and instruction['operand_2'] in self.architecture.ptr_memory:
-                    self.architecture.registers[instruction['operand_1']] = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-            case _:
-                return "ERROR UNRECOGNIZED INSTRUCTION"
-
-        return "LDA" + " " + instruction['operand_1'] + " " + instruction['operand_2']
+        self.architecture.register_words[instruction.operand_1] = self.give_value(instruction.param_type_2, instruction.operand_2)
 
     def STR(self, instruction):
         """
@@ -229,29 +374,11 @@ class Instruction:
         instruction.param_type_2: Source register/constant
         instruction.operand_2: Source register/constant
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "memory" or instruction['param_type_2'] not in ["register", "constant"]:
-            raise ValueError("Invalid param type")
-
         # Give address of Destination variable
-        instruction = self.give_address_memory(instruction, 1)
-
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
+        position = self.give_address_memory(instruction.operand_1)
 
         # Execute instruction
-        match instruction['param_type_2']:
-            case "register":
-                if instruction['operand_1'] in self.architecture.ptr_memory and instruction['operand_2'] in self.architecture.registers:
-                    self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_1']], 2)] = self.architecture.registers[instruction['operand_2']]
-            case "constant":
-                if instruction['operand_1'] in self.architecture.ptr_memory:
-                    self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_1']], 2)] = instruction['operand_2']
-            case _:
-                return "ERROR UNRECOGNIZED INSTRUCTION"
-
-        return "STR" + " " + instruction['operand_1'] + " " + instruction['operand_2']
+        self.architecture.memory_words[position] = self.give_value(instruction.param_type_2, instruction.operand_2)
 
     def PUSH(self, instruction):
         """
@@ -261,35 +388,15 @@ class Instruction:
         instruction.operand_1: Source register/constant/variable
         Push the value of the register/constant/variable to the stack
         """
-        # Verify parameters
-        if instruction['param_type_1'] not in ["memory", "register", "constant"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Source if register
-        if instruction['operand_1'] and instruction['param_type_1'] == "register":
-            instruction = self.give_address_register(instruction, 1)
-
-        # Give address of Source if memory
-        if instruction['operand_1'] and instruction['param_type_1'] == "memory":
-            instruction = self.give_address_memory(instruction, 1)
+        # Give value of Source register/constant/variable
+        value = self.give_value(instruction.param_type_1, instruction.operand_1)
 
         # Pushing to the stack
-        if len(self.architecture.stack) > 4096:
+        if len(self.architecture.stack_words) > STACK_LIMIT:
             raise OverflowError("Stack overflow")
 
         # Execute instruction
-        match instruction['param_type_1']:
-            case "register":
-                if instruction['operand_1'] in self.architecture.registers:
-                    self.architecture.stack.append(self.architecture.registers[instruction['operand_1']])
-            case "constant":
-                self.architecture.stack.append(instruction['operand_1'])
-            case "memory":
-                if instruction['operand_1'] in self.architecture.ptr_memory:
-                    self.architecture.stack.append(self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_1']], 2)])
-            case _:
-                return "ERROR UNRECOGNIZED INSTRUCTION"
-        return "PUSH" + " " + instruction['operand_1']
+        self.architecture.stack_words.append(value)
 
     def POP(self, instruction):
         """
@@ -299,23 +406,12 @@ class Instruction:
         instruction.operand_1: Destination register
         Pop the value of the stack to the register
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register":
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
-
         # Poping from the stack
-        if len(self.architecture.stack) == 0:
+        if len(self.architecture.stack_words) == 0:
             raise OverflowError("Stack underflow")
 
         # Execute instruction
-        if instruction['operand_1'] in self.architecture.registers:
-            self.architecture.registers[instruction['operand_1']] = self.architecture.stack.pop()
-        else:
-            raise ValueError("Invalid register")
-        return "POP" + " " + instruction['operand_1']
+        self.architecture.register_words[instruction.operand_1] = self.architecture.stack_words.pop()
 
     def AND(self, instruction):
         """
@@ -327,35 +423,14 @@ class Instruction:
         instruction.operand_2: Source register/constant/variable
         Perform a bitwise AND operation between the two operands and store the result in the destination register
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register" or instruction['param_type_2'] not in ["register", "constant", "memory"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
-        operand_1 = self.architecture.registers[instruction['operand_1']]
-
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
+        registers = self.architecture.register_words
+        operand_1 = registers[instruction.operand_1]
 
-        # Give address of Source if memory
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of Source register/constant/variable
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        result = ""
-
-        for i in range(0, len(operand_1)):
-            result += str(int(operand_1[i]) & int(operand_2[i]))
-
-        self.architecture.registers[instruction['operand_1']] = result
-        return "AND" + " " + instruction['operand_1'] + " " + instruction['operand_2']
+        registers[instruction.operand_1] = operand_1 & operand_2
 
     def OR(self, instruction):
         """
@@ -367,35 +442,14 @@ class Instruction:
         instruction.operand_2: Source register/constant/variable
         Perform a bitwise OR operation between the two operands and store the result in the destination register
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register" or instruction['param_type_2'] not in ["register", "constant", "memory"]:
-            raise ValueError("Invalid param type")
+        registers = self.architecture.register_words
+        operand_1 = registers[instruction.operand_1]
 
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
-        operand_1 = self.architecture.registers[instruction['operand_1']]
-
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
-
-        # Give address of Source if memory
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of Source register/constant/variable
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        result = ""
-
-        for i in range(0, len(operand_1)):
-            result += str(int(operand_1[i]) | int(operand_2[i]))
-
-        self.architecture.registers[instruction['operand_1']] = result
-        return "OR" + " " + instruction['operand_1'] + " " + instruction['operand_2']
+        registers[instruction.operand_1] = operand_1 | operand_2
 
     def NOT(self, instruction):
         """
@@ -405,22 +459,9 @@ class Instruction:
         instruction.operand_1: Destination register
         Perform a bitwise NOT operation on the refered register and store the result in the destination register
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register":
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
-
         # Execute instruction
-        operand_1 = self.architecture.registers[instruction['operand_1']]
-        result = ""
-
-        for i in range(0, len(operand_1)):
-            result += str(int(not int(operand_1[i])))
-
-        self.architecture.registers[instruction['operand_1']] = result
-        return "NOT" + " " + instruction['operand_1']
+        registers = self.architecture.register_words
+        registers[instruction.operand_1] = ~registers[instruction.operand_1] & WORD_MASK
 
     def ADD(self, instruction):
         """
@@ -432,37 +473,18 @@ class Instruction:
         instruction.operand_2: Source register/constant/variable
         Perform an addition between the two operands and store the result in the destination register
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register" or instruction['param_type_2'] not in ["register", "constant", "memory"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
-        operand_1 = self.architecture.registers[instruction['operand_1']]
+        registers = self.architecture.register_words
+        operand_1 = registers[instruction.operand_1]
 
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
-
-        # Give address of Source if memory
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of Source register/constant/variable
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        operand_1 = int(operand_1, 2)
-        operand_2 = int(operand_2, 2)
         result = operand_1 + operand_2
-        if result > 511:
+        if result > WORD_MASK:
             raise OverflowError("Overflow")
 
-        result = bin(result)[2:].zfill(9)
-        self.architecture.registers[instruction['operand_1']] = result
-        return "ADD" + " " + instruction['operand_1'] + " " + instruction['operand_2']
+        registers[instruction.operand_1] = result
 
     def SUB(self, instruction):
         """
@@ -474,37 +496,18 @@ class Instruction:
         instruction.operand_2: Source register/constant/variable
         Perform a subtraction between the two operands and store the result in the destination register
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register" or instruction['param_type_2'] not in ["register", "constant", "memory"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
-        operand_1 = self.architecture.registers[instruction['operand_1']]
+        registers = self.architecture.register_words
+        operand_1 = registers[instruction.operand_1]
 
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
-
-        # Give address of Source if memory
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of Source register/constant/variable
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        operand_1 = int(operand_1, 2)
-        operand_2 = int(operand_2, 2)
         result = operand_2 - operand_1
         if result < 0:
             raise OverflowError("Underflow")
 
-        result = bin(result)[2:].zfill(9)
-        self.architecture.registers[instruction['operand_1']] = result
-        return "SUB" + " " + instruction['operand_1'] + " " + instruction['operand_2']
+        registers[instruction.operand_1] = result
 
     def DIV(self, instruction):
         """
@@ -516,43 +519,20 @@ class Instruction:
         instruction.operand_2: Source register/constant/variable
         Perform a division between the two operands and store the result in the destination register
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register" or instruction['param_type_2'] not in ["register", "constant", "memory"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
-        operand_1 = self.architecture.registers[instruction['operand_1']]
-
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
+        registers = self.architecture.register_words
+        operand_1 = registers[instruction.operand_1]
 
-        # Give address of Source if memory
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of Source register/constant/variable
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        operand_1 = int(operand_1, 2)
-        operand_2 = int(operand_2, 2)
-
         if operand_1 == 0:
             raise ZeroDivisionError("Division by zero")
 
         result = operand_2 // operand_1
         # Overflow and underflow not possible
-        # if result > 511:
-        #    raise OverflowError("Overflow")
 
-        print(operand_2, operand_1, result)
-        result = bin(result)[2:].zfill(9)
-        self.architecture.registers[instruction['operand_1']] = result
-        return "DIV" + " " + instruction['operand_1'] + " " + instruction['operand_2']
+        registers[instruction.operand_1] = result
 
     def MUL(self, instruction):
         """
@@ -564,37 +544,18 @@ class Instruction:
         instruction.operand_2: Source register/constant/variable
         Perform a multiplication between the two operands and store the result in the destination register
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register" or instruction['param_type_2'] not in ["register", "constant", "memory"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
-        operand_1 = self.architecture.registers[instruction['operand_1']]
+        registers = self.architecture.register_words
+        operand_1 = registers[instruction.operand_1]
 
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
-
-        # Give address of Source if memory
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of Source register/constant/variable
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        operand_1 = int(operand_1, 2)
-        operand_2 = int(operand_2, 2)
         result = operand_2 * operand_1
-        if result > 511:
+        if result > WORD_MASK:
             raise OverflowError("Overflow")
 
-        result = bin(result)[2:].zfill(9)
-        self.architecture.registers[instruction['operand_1']] = result
-        return "MUL" + " " + instruction['operand_1'] + " " + instruction['operand_2']
+        registers[instruction.operand_1] = result
 
     def MOD(self, instruction):
         """
@@ -606,39 +567,18 @@ class Instruction:
         instruction.operand_2: Source register/constant/variable
         Perform a modulo between the two operands and store the result in the destination register
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register" or instruction['param_type_2'] not in ["register", "constant", "memory"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
-        operand_1 = self.architecture.registers[instruction['operand_1']]
-
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
+        registers = self.architecture.register_words
+        operand_1 = registers[instruction.operand_1]
 
-        # Give address of Source if memory
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of Source register/constant/variable
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        operand_1 = int(operand_1, 2)
-        operand_2 = int(operand_2, 2)
         if operand_1 == 0:
             raise ZeroDivisionError("Division by zero")
         result = operand_2 % operand_1
-        if result > 511:
-            raise OverflowError("Overflow")
 
-        result = bin(result)[2:].zfill(9)
-        self.architecture.registers[instruction['operand_1']] = result
-        return "MOD" + " " + instruction['operand_1'] + " " + instruction['operand_2']
+        registers[instruction.operand_1] = result
 
     def INC(self, instruction):
         """
@@ -648,26 +588,13 @@ class Instruction:
         instruction.operand_1: Destination register
         Increment the value of the register by 1
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register":
-            raise ValueError("Invalid param type")
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
         # Execute instruction
-
-        operand_1 = self.architecture.registers[instruction['operand_1']]
-        result = ""
-        binary_value = int(operand_1, 2)
-        binary_value += 1
-        result = bin(binary_value)[2:].zfill(len(operand_1))
-        print(result)
-        if len(result) > 9:
+        registers = self.architecture.register_words
+        result = registers[instruction.operand_1] + 1
+        if result > WORD_MASK:
             raise OverflowError("Overflow")
 
-        self.architecture.registers[instruction['operand_1']] = result
-
-        return "INC" + " " + instruction['operand_1']
-
+        registers[instruction.operand_1] = result
 
     def DEC(self, instruction):
         """
@@ -677,24 +604,13 @@ class Instruction:
         instruction.operand_1: Destination register
         Decrement the value of the register by 1
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "register":
-            raise ValueError("Invalid param type")
-        # Give address of Destination register
-        instruction = self.give_address_register(instruction, 1)
         # Execute instruction
-
-        operand_1 = self.architecture.registers[instruction['operand_1']]
-        result = ""
-        binary_value = int(operand_1, 2)
-        if binary_value == 0:
+        registers = self.architecture.register_words
+        result = registers[instruction.operand_1]
+        if result == 0:
             raise OverflowError("Underflow")
-        binary_value -= 1
-        result = bin(binary_value)[2:].zfill(len(operand_1))
-        print(result)
-        self.architecture.registers[instruction['operand_1']] = result
 
-        return "DEC" + " " + instruction['operand_1']
+        registers[instruction.operand_1] = result - 1
 
     def BEQ(self, instruction):
         """
@@ -707,42 +623,15 @@ class Instruction:
         instruction.label: Line to jump to (PC)
         Perform a comparison between the two operands and jump to the label if they are equal
         """
-        # Verify parameters
-        if instruction['param_type_1'] not in ["memory", "register", "constant"] or instruction ['param_type_2'] not in ["memory", "register", "constant"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        if instruction['operand_1'] and instruction['param_type_1'] == "register":
-            instruction = self.give_address_register(instruction, 1)
-            operand_1 = self.architecture.registers[instruction['operand_1']]
-
-        elif instruction['operand_1'] and instruction['param_type_1'] == "memory":
-            instruction = self.give_address_memory(instruction, 1)
-            operand_1 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_1']], 2)]
-
-        elif instruction['operand_1'] and instruction['param_type_1'] == "constant":
-            operand_1 = instruction['operand_1']
-
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of both operands
+        operand_1 = self.give_value(instruction.param_type_1, instruction.operand_1)
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        operand_1 = int(operand_1, 2)
-        operand_2 = int(operand_2, 2)
-        result = bool(operand_1 == operand_2)
-        if result:
-            self.architecture.program_counter = int(instruction['label'], 2)
-
-        return "BEQ" + " " + instruction['operand_1'] + " " + instruction['operand_2'] + " " + instruction['label']
+        if operand_1 == operand_2:
+            self.architecture.program_counter = instruction.label
+            return True
+        return False
 
     def BNE(self, instruction):
         """
@@ -755,42 +644,15 @@ class Instruction:
         instruction.label: Line to jump to (PC)
         Perform a comparison between the two operands and jump to the label if they are not equal
         """
-        # Verify parameters
-        if instruction['param_type_1'] not in ["memory", "register", "constant"] or instruction ['param_type_2'] not in ["memory", "register", "constant"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        if instruction['operand_1'] and instruction['param_type_1'] == "register":
-            instruction = self.give_address_register(instruction, 1)
-            operand_1 = self.architecture.registers[instruction['operand_1']]
-
-        elif instruction['operand_1'] and instruction['param_type_1'] == "memory":
-            instruction = self.give_address_memory(instruction, 1)
-            operand_1 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_1']], 2)]
-
-        elif instruction['operand_1'] and instruction['param_type_1'] == "constant":
-            operand_1 = instruction['operand_1']
-
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of both operands
+        operand_1 = self.give_value(instruction.param_type_1, instruction.operand_1)
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        operand_1 = int(operand_1, 2)
-        operand_2 = int(operand_2, 2)
-        result = bool(operand_1 != operand_2)
-        if result:
-            self.architecture.program_counter = int(instruction['label'], 2)
-
-        return "BNE" + " " + instruction['operand_1'] + " " + instruction['operand_2'] + " " + instruction['label']
+        if operand_1 != operand_2:
+            self.architecture.program_counter = instruction.label
+            return True
+        return False
 
     def BBG(self, instruction):
         """
@@ -803,42 +665,15 @@ class Instruction:
         instruction.label: Line to jump to (PC)
         Perform a comparison between the two operands and jump to the label if the first operand is bigger than the second
         """
-        # Verify parameters
-        if instruction['param_type_1'] not in ["memory", "register", "constant"] or instruction ['param_type_2'] not in ["memory", "register", "constant"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        if instruction['operand_1'] and instruction['param_type_1'] == "register":
-            instruction = self.give_address_register(instruction, 1)
-            operand_1 = self.architecture.registers[instruction['operand_1']]
-
-        elif instruction['operand_1'] and instruction['param_type_1'] == "memory":
-            instruction = self.give_address_memory(instruction, 1)
-            operand_1 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_1']], 2)]
-
-        elif instruction['operand_1'] and instruction['param_type_1'] == "constant":
-            operand_1 = instruction['operand_1']
-
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of both operands
+        operand_1 = self.give_value(instruction.param_type_1, instruction.operand_1)
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        operand_1 = int(operand_1, 2)
-        operand_2 = int(operand_2, 2)
-        result = bool(operand_1 > operand_2)
-        if result:
-            self.architecture.program_counter = int(instruction['label'], 2)
-
-        return "BBG" + " " + instruction['operand_1'] + " " + instruction['operand_2'] + " " + instruction['label']
+        if operand_1 > operand_2:
+            self.architecture.program_counter = instruction.label
+            return True
+        return False
 
     def BSM(self, instruction):
         """
@@ -851,42 +686,15 @@ class Instruction:
         instruction.label: Line to jump to (PC)
         Perform a comparison between the two operands and jump to the label if the first operand is smaller than the second
         """
-        # Verify parameters
-        if instruction['param_type_1'] not in ["memory", "register", "constant"] or instruction ['param_type_2'] not in ["memory", "register", "constant"]:
-            raise ValueError("Invalid param type")
-
-        # Give address of Destination register
-        if instruction['operand_1'] and instruction['param_type_1'] == "register":
-            instruction = self.give_address_register(instruction, 1)
-            operand_1 = self.architecture.registers[instruction['operand_1']]
-
-        elif instruction['operand_1'] and instruction['param_type_1'] == "memory":
-            instruction = self.give_address_memory(instruction, 1)
-            operand_1 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_1']], 2)]
-
-        elif instruction['operand_1'] and instruction['param_type_1'] == "constant":
-            operand_1 = instruction['operand_1']
-
-        # Give address of Source if register
-        if instruction['operand_2'] and instruction['param_type_2'] == "register":
-            instruction = self.give_address_register(instruction, 2)
-            operand_2 = self.architecture.registers[instruction['operand_2']]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "memory":
-            instruction = self.give_address_memory(instruction, 2)
-            operand_2 = self.architecture.memory[int(self.architecture.ptr_memory[instruction['operand_2']], 2)]
-
-        elif instruction['operand_2'] and instruction['param_type_2'] == "constant":
-            operand_2 = instruction['operand_2']
+        # Give value of both operands
+        operand_1 = self.give_value(instruction.param_type_1, instruction.operand_1)
+        operand_2 = self.give_value(instruction.param_type_2, instruction.operand_2)
 
         # Execute instruction
-        operand_1 = int(operand_1, 2)
-        operand_2 = int(operand_2, 2)
-        result = bool(operand_1 < operand_2)
-        if result:
-            self.architecture.program_counter = int(instruction['label'], 2)
-
-        return "BSM" + " " + instruction['operand_1'] + " " + instruction['operand_2'] + " " + instruction['label']
+        if operand_1 < operand_2:
+            self.architecture.program_counter = instruction.label
+            return True
+        return False
 
     def JMP(self, instruction):
         """
@@ -896,14 +704,9 @@ class Instruction:
         instruction.label: Line to jump to (PC)
         Jump to the line (Affect PC)
         """
-        # Verify parameters
-        if instruction['param_type_1'] != "label":
-            raise ValueError("Invalid param type")
-
         # Execute instruction
-        self.architecture.program_counter = int(instruction['label'], 2)
-
-        return "JMP" + " " + instruction['label']
+        self.architecture.program_counter = instruction.label
+        return True
 
     def HLT(self, instruction):
         """
@@ -914,8 +717,6 @@ class Instruction:
         # Execute instruction
         self.architecture.program_counter = len(self.architecture.memory_code) - 1
 
-        return "HLT"
-
     def VAD(self, instruction):
         """
         Specific Design from here
@@ -927,24 +728,12 @@ class Instruction:
         operand 1: ASCII value of the variable name
         operand 2: value of the variable
         """
-        if instruction['param_type_1'] != "constant" or instruction['param_type_2'] != "constant":
-            raise ValueError("Invalid param type")
-
-        # Valdiators
-        # ASCII must not contain space and special characters
-        string = instruction['operand_1'][2:] + instruction['operand_2'] + instruction['label']
-        string = chr(int("0b0" + string[0:7], 2)) + chr(int("0b0" + string[7:14], 2)) + chr(int("0b0" + string[14:21], 2))
-        regex = r'[a-zA-Z]*'
-        if not re.fullmatch(regex, string):
-            raise ValueError("Invalid variable name")
-
         # Check if variable already exists
-        if string in self.architecture.ptr_memory.keys():
+        if instruction.variable_name in self.architecture.variable_positions:
             raise ValueError("Variable already exists")
 
         # Execute instruction
-        self.architecture.add_to_memory(string, None)
-        return "VAD" + " " + string
+        self.architecture.add_to_memory(instruction.variable_name, None)
 
     def VDE(self, instruction):
         """
@@ -957,21 +746,9 @@ class Instruction:
         operand 1: ASCII value of the variable name
         operand 2: value of the variable
         """
-        if instruction['param_type_1'] != "constant" or instruction['param_type_2'] != "constant":
-            raise ValueError("Invalid param type")
-
-        # Valdiators
-        # ASCII must not contain space and special characters
-        string = instruction['operand_1'][2:] + instruction['operand_2'] + instruction['label']
-        string = chr(int("0b0" + string[0:7], 2)) + chr(int("0b0" + string[7:14], 2)) + chr(int("0b0" + string[14:21], 2))
-        regex = r'[a-zA-Z]*'
-        if not re.fullmatch(regex, string):
-            raise ValueError("Invalid variable name")
-
         # Check if variable already exists
-        if string not in self.architecture.ptr_memory.keys():
+        if instruction.variable_name not in self.architecture.variable_positions:
             raise ValueError("Variable does not exists")
 
         # Execute instruction
-        self.architecture.remove_from_memory(string)
-        return "VDE" + " " + string
\ No newline at end of file
+        self.architecture.remove_from_memory(instruction.variable_name)
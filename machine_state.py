@@ -0,0 +1,127 @@
+"""
+Integer-backed storage of the simulated machine state
+
+Words are stored as native ints (memory in an array('H'), registers in a fixed list of 4 slots, stack in a list).
+The 9-bit binary strings used by the rest of the project ("000000101") are only built when a caller asks for them,
+through the views defined below.
+"""
+from array import array
+
+WORD_SIZE = 9
+WORD_MASK = 0b111111111  # Largest value a word can hold (511)
+MEMORY_SIZE = 512  # 512 the maximum size of our memory, due to the 9-bit pointer
+STACK_LIMIT = 4096
+REGISTER_NAMES = ('t0', 't1', 't2', 't3')
+REGISTER_INDEX = {name: index for index, name in enumerate(REGISTER_NAMES)}
+
+
+def new_memory():
+    """
+    :return: Zeroed memory of MEMORY_SIZE words
+    """
+    return array('H', bytes(2 * MEMORY_SIZE))
+
+
+def new_registers():
+    """
+    :return: Zeroed register slots (t0 to t3)
+    """
+    return [0] * len(REGISTER_NAMES)
+
+
+def to_binary(value):
+    """
+    Convert a word to its 9-bit binary string
+    :param value: Word to convert
+    :return: Binary string of the word
+    """
+    return format(value, '09b')
+
+
+def to_word(value):
+    """
+    Convert a binary string (or an int) to a word
+    :param value: Binary string or int to convert
+    :return: Integer value of the word
+    """
+    if isinstance(value, str):
+        value = int(value, 2)
+    if not 0 <= value <= WORD_MASK:
+        raise OverflowError("Overflow")
+    return value
+
+
+class BinaryWordList:
+    """
+    Binary string view of a sequence of words (memory or stack)
+    Reading gives 9-bit strings, writing accepts binary strings or ints
+    """
+    def __init__(self, words):
+        self.words = words
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [to_binary(word) for word in self.words[index]]
+        return to_binary(self.words[index])
+
+    def __setitem__(self, index, value):
+        self.words[index] = to_word(value)
+
+    def __iter__(self):
+        return (to_binary(word) for word in self.words)
+
+    def __reversed__(self):
+        return (to_binary(word) for word in reversed(self.words))
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def append(self, value):
+        self.words.append(to_word(value))
+
+    def pop(self):
+        return to_binary(self.words.pop())
+
+
+class BinaryRegisterView:
+    """
+    Binary string view of the registers, behaves like the {'t0': "000000000", ...} dictionary
+    """
+    def __init__(self, words):
+        self.words = words
+
+    def __len__(self):
+        return len(REGISTER_NAMES)
+
+    def __contains__(self, name):
+        return name in REGISTER_INDEX
+
+    def __getitem__(self, name):
+        return to_binary(self.words[REGISTER_INDEX[name]])
+
+    def __setitem__(self, name, value):
+        self.words[REGISTER_INDEX[name]] = to_word(value)
+
+    def __iter__(self):
+        return iter(REGISTER_NAMES)
+
+    def __eq__(self, other):
+        return dict(self.items()) == dict(other)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def keys(self):
+        return list(REGISTER_NAMES)
+
+    def values(self):
+        return [to_binary(word) for word in self.words]
+
+    def items(self):
+        return [(name, to_binary(word)) for name, word in zip(REGISTER_NAMES, self.words)]
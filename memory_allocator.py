@@ -0,0 +1,80 @@
+"""
+Allocator of the data memory positions used by the variables (VAD/VDE)
+
+Free positions are kept in a bitmap (an int where bit i is set if position i is free), so taking the lowest free
+position and releasing a position do not depend on the number of live variables.
+"""
+from machine_state import MEMORY_SIZE
+
+
+class MemoryAllocator:
+    def __init__(self, size=MEMORY_SIZE):
+        """
+        :param size: Number of memory positions
+        """
+        self.size = size
+        self.free = (1 << size) - 1  # Every position is free
+        self.used = 0
+        self.high_water_mark = 0  # Highest position ever allocated + 1
+
+    def allocate(self):
+        """
+        Take the lowest free position
+        :return: Allocated position, None if there is no space in memory
+        """
+        if not self.free:
+            return None
+        lowest = self.free & -self.free
+        self.free ^= lowest
+        position = lowest.bit_length() - 1
+        self.used += 1
+        if position >= self.high_water_mark:
+            self.high_water_mark = position + 1
+        return position
+
+    def claim(self, position):
+        """
+        Take a given position (used when the variables are restored)
+        :param position: Position to take
+        """
+        bit = 1 << position
+        if not self.free & bit:
+            raise ValueError("Invalid memory position: position already used")
+        self.free ^= bit
+        self.used += 1
+        if position >= self.high_water_mark:
+            self.high_water_mark = position + 1
+
+    def release(self, position):
+        """
+        Give back a position
+        :param position: Position to release
+        """
+        bit = 1 << position
+        if self.free & bit:
+            raise ValueError("Invalid memory position: position already free")
+        self.free |= bit
+        self.used -= 1
+
+    def is_free(self, position):
+        """
+        :param position: Position to check
+        :return: True if the position is free
+        """
+        return bool(self.free >> position & 1)
+
+    def stats(self):
+        """
+        Fragmentation is the share of free positions below the highest used position
+        :return: Dictionary with the allocation statistics
+        """
+        top = (~self.free & ((1 << self.size) - 1)).bit_length()  # Highest used position + 1
+        holes = top - self.used
+        return {
+            'size': self.size,
+            'used': self.used,
+            'free': self.size - self.used,
+            'high_water_mark': self.high_water_mark,
+            'holes': holes,
+            'fragmentation': holes / top if top else 0.0,
+        }
@@ -0,0 +1,146 @@
+"""
+Opt-in profiling of the executed instructions
+
+A Profiler attached to an Instruction object replaces its execute_instruction by a measuring version (instance
+attribute), so every execution path (full, step and quiet with the interpreter) is measured, and detaching it removes
+the attribute: a program executed without profiler does not pay any check.
+
+Counters:
+    - executions and accumulated wall time per op code
+    - executions per program counter (hot PC histogram)
+    - taken and not taken counts of each branch (JMP is always taken)
+
+Usage: python profiler.py <program file> [--top N] [--json]
+"""
+import argparse
+import json
+import time
+
+
+class Profiler:
+    def __init__(self):
+        self.op_counts = {}  # Op code -> executions
+        self.op_times = {}  # Op code -> accumulated wall time in seconds
+        self.pc_counts = {}  # Program counter -> executions
+        self.branches = {}  # Program counter -> [op code, taken, not taken]
+        self.instruction_set = None
+
+    def attach(self, instruction_set):
+        """
+        Measure the instructions executed by an Instruction object
+        :param instruction_set: Instruction object
+        """
+        self.detach()
+        execute = instruction_set.execute_instruction
+        architecture = instruction_set.architecture
+        op_counts, op_times, pc_counts, branches = self.op_counts, self.op_times, self.pc_counts, self.branches
+        clock = time.perf_counter
+
+        def execute_instruction(instruction):
+            program_counter = architecture.program_counter
+            start = clock()
+            taken = execute(instruction)
+            elapsed = clock() - start
+
+            op_code = instruction.op_code
+            op_counts[op_code] = op_counts.get(op_code, 0) + 1
+            op_times[op_code] = op_times.get(op_code, 0.0) + elapsed
+            pc_counts[program_counter] = pc_counts.get(program_counter, 0) + 1
+            if taken is not None:  # Branches return True if taken, False otherwise
+                branch = branches.get(program_counter)
+                if branch is None:
+                    branch = branches[program_counter] = [op_code, 0, 0]
+                branch[1 if taken else 2] += 1
+            return taken
+
+        instruction_set.execute_instruction = execute_instruction
+        self.instruction_set = instruction_set
+
+    def detach(self):
+        """
+        Stop measuring, the counters are kept
+        """
+        if self.instruction_set is not None:
+            del self.instruction_set.execute_instruction
+            self.instruction_set = None
+
+    def reset(self):
+        """
+        Clear the counters
+        """
+        self.op_counts.clear()
+        self.op_times.clear()
+        self.pc_counts.clear()
+        self.branches.clear()
+
+    def report(self):
+        """
+        :return: Dictionary of the counters, JSON serializable, sorted by decreasing executions or time
+        """
+        total = sum(self.op_counts.values())
+        return {
+            'instructions': total,
+            'time': sum(self.op_times.values()),
+            'op_codes': {
+                op_code: {
+                    'count': count,
+                    'time': self.op_times[op_code],
+                    'time_per_instruction': self.op_times[op_code] / count,
+                    'share': count / total,
+                }
+                for op_code, count in sorted(self.op_counts.items(), key=lambda item: -self.op_times[item[0]])
+            },
+            'program_counters': dict(sorted(self.pc_counts.items(), key=lambda item: -item[1])),
+            'branches': {
+                program_counter: {'op_code': op_code, 'taken': taken, 'not_taken': not_taken}
+                for program_counter, (op_code, taken, not_taken) in sorted(self.branches.items())
+            },
+        }
+
+    def table(self, top=10):
+        """
+        :param top: Number of program counters of the hot PC histogram
+        :return: Flat text table of the counters
+        """
+        report = self.report()
+        lines = [f"{'op code':<8}{'count':>12}{'share':>8}{'total ms':>12}{'ns/instr':>10}"]
+        for op_code, counters in report['op_codes'].items():
+            lines.append(f"{op_code:<8}{counters['count']:>12}{counters['share']:>8.1%}"
+                         f"{counters['time'] * 1000:>12.3f}{counters['time_per_instruction'] * 1e9:>10.0f}")
+        lines.append(f"{'total':<8}{report['instructions']:>12}{'':>8}{report['time'] * 1000:>12.3f}")
+
+        lines.append("")
+        lines.append(f"{'pc':<8}{'count':>12}{'share':>8}")
+        for program_counter, count in list(report['program_counters'].items())[:top]:
+            lines.append(f"{program_counter:<8}{count:>12}{count / report['instructions']:>8.1%}")
+
+        if report['branches']:
+            lines.append("")
+            lines.append(f"{'pc':<8}{'branch':<8}{'taken':>12}{'not taken':>12}")
+            for program_counter, branch in report['branches'].items():
+                lines.append(f"{program_counter:<8}{branch['op_code']:<8}{branch['taken']:>12}{branch['not_taken']:>12}")
+        return "\n".join(lines)
+
+
+def main():
+    from Assembly import Architecture
+
+    parser = argparse.ArgumentParser(description="Profile the execution of a program")
+    parser.add_argument("program")
+    parser.add_argument("--top", type=int, default=10, help="number of program counters of the hot PC histogram")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    architecture = Architecture()
+    architecture.fetch_data(args.program)
+    profiler = architecture.enable_profiler()
+    result = architecture.execute_program("quiet")
+    if args.json:
+        print(json.dumps({'result': result.to_dict(), 'profile': profiler.report()}, indent=2))
+    else:
+        print(f"Halt reason: {result.halt_reason}" + (f" ({result.error})" if result.error else ""))
+        print(profiler.table(args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Packed binary format of the programs
+
+The text format stores every bit as an ASCII '0'/'1', a packed program stores every 32-bit instruction as a real
+4-byte word (little-endian) after a 16-byte header:
+    4 bytes - Magic (b'M7PG')
+    2 bytes - Version
+    2 bytes - Reserved (0)
+    4 bytes - Instruction count
+    4 bytes - CRC-32 of the instruction words
+
+Usage: python program_format.py pack <text file or mnemonic source> <packed file>
+       python program_format.py unpack <packed file> <text file>
+"""
+import argparse
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+from assembler import assemble_file, is_assembly_file
+from file_manager import iter_words
+from instructions import decode_word
+
+MAGIC = b'M7PG'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+WORD = struct.Struct('<I')
+EXTENSION = '.m7p'
+MAPPED_CACHE_SIZE = 4096  # Decoded instructions kept by a MappedProgram
+
+WORD_TYPE = 'I' if array('I').itemsize == 4 else 'L'  # Unsigned 32-bit array type code
+
+
+def is_packed_file(file_path):
+    """
+    :param file_path: Path of the file to check
+    :return: True if the file starts with the packed program magic
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        raise FileNotFoundError(f'File {file_path} not found')
+
+
+def read_header(file_path, data):
+    """
+    Verify the header of a packed program
+    :param file_path: Path of the file (for the error messages)
+    :param data: Header bytes
+    :return: Instruction count and checksum
+    """
+    if len(data) < HEADER.size:
+        raise ValueError(f'File {file_path} is not a valid packed program (Header is truncated)')
+    magic, version, _, count, checksum = HEADER.unpack(data[:HEADER.size])
+    if magic != MAGIC:
+        raise ValueError(f'File {file_path} is not a valid packed program (Bad magic)')
+    if version != VERSION:
+        raise ValueError(f'File {file_path} is not a valid packed program (Unsupported version {version})')
+    return count, checksum
+
+
+def read_packed(file_path):
+    """
+    Load a packed program, the instructions are read into an array in a single read
+    :param file_path: Path of the file to load
+    :return: array of the 32-bit instructions
+    """
+    try:
+        f = open(file_path, 'rb')
+    except FileNotFoundError:
+        raise FileNotFoundError(f'File {file_path} not found')
+
+    with f:
+        count, checksum = read_header(file_path, f.read(HEADER.size))
+        words = array(WORD_TYPE)
+        try:
+            words.fromfile(f, count)
+        except EOFError:
+            raise ValueError(f'File {file_path} is not a valid packed program (Expected {count} instructions)')
+
+    if zlib.crc32(words) != checksum:
+        raise ValueError(f'File {file_path} is not a valid packed program (Checksum mismatch)')
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words
+
+
+def write_packed(file_path, words):
+    """
+    Save a program in the packed format
+    :param file_path: Path of the file to write
+    :param words: 32-bit instructions as ints
+    """
+    words = array(WORD_TYPE, words)
+    if sys.byteorder == 'big':
+        words.byteswap()
+    with open(file_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(words), zlib.crc32(words)))
+        words.tofile(f)
+
+
+def read_program(file_path):
+    """
+    Load the 32-bit instructions of a program, packed, text or mnemonic source
+    :param file_path: Path of the file to load
+    :return: Iterable of the 32-bit instructions as ints
+    """
+    if is_packed_file(file_path):
+        return read_packed(file_path)
+    if is_assembly_file(file_path):
+        return assemble_file(file_path)
+    return iter_words(file_path)
+
+
+class MappedProgram:
+    """
+    Packed program executed straight from its memory-mapped file
+    Opening it only reads the header, each instruction is decoded on its first fetch and kept in a bounded cache,
+    so the startup does not depend on the size of the program
+    Can be used as Architecture.memory_code (len, indexing and iteration)
+    """
+    def __init__(self, file_path, cache_size=MAPPED_CACHE_SIZE, verify=False):
+        """
+        :param file_path: Path of the packed program
+        :param cache_size: Maximum number of decoded instructions kept
+        :param verify: Verify the checksum (reads the whole file)
+        """
+        self.file_path = file_path
+        try:
+            with open(file_path, 'rb') as f:
+                count, checksum = read_header(file_path, f.read(HEADER.size))
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise FileNotFoundError(f'File {file_path} not found')
+
+        if len(self.map) < HEADER.size + WORD.size * count:
+            self.map.close()
+            raise ValueError(f'File {file_path} is not a valid packed program (Expected {count} instructions)')
+        if verify and zlib.crc32(memoryview(self.map)[HEADER.size:HEADER.size + WORD.size * count]) != checksum:
+            self.map.close()
+            raise ValueError(f'File {file_path} is not a valid packed program (Checksum mismatch)')
+
+        self.count = count
+        self.cache_size = cache_size
+        self.cache = {}  # Program counter -> DecodedInstruction, oldest entries are evicted first
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, program_counter):
+        instruction = self.cache.get(program_counter)
+        if instruction is None:
+            if not 0 <= program_counter < self.count:
+                raise IndexError("Program counter out of range")
+            instruction = decode_word(WORD.unpack_from(self.map, HEADER.size + WORD.size * program_counter)[0])
+            if len(self.cache) >= self.cache_size:
+                del self.cache[next(iter(self.cache))]
+            self.cache[program_counter] = instruction
+        return instruction
+
+    def __iter__(self):
+        for program_counter in range(self.count):
+            yield self[program_counter]
+
+    def __repr__(self):
+        return f"MappedProgram({self.file_path!r}, {self.count} instructions)"
+
+    def close(self):
+        """
+        Close the memory map
+        """
+        self.cache = {}
+        self.map.close()
+
+
+def text_to_packed(text_path, packed_path):
+    """
+    Convert a text program ('0'/'1') or a mnemonic source to the packed format
+    :param text_path: Path of the text program
+    :param packed_path: Path of the packed program to write
+    """
+    write_packed(packed_path, read_program(text_path))
+
+
+def packed_to_text(packed_path, text_path):
+    """
+    Convert a packed program to the text format, one 32-bit instruction per line
+    :param packed_path: Path of the packed program
+    :param text_path: Path of the text program to write
+    """
+    with open(text_path, 'w') as f:
+        for word in read_packed(packed_path):
+            f.write(format(word, '032b') + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert programs between the text and the packed format")
+    parser.add_argument("command", choices=["pack", "unpack"])
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        text_to_packed(args.source, args.destination)
+    else:
+        packed_to_text(args.source, args.destination)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+; sample_4.txt written as source
+#DATA
+MASK = (1 << 4) - 1
+AaB 511
+Aab 7
+#CODE
+        PUSH AaB
+        PUSH Aab
+        POP t0
+        POP t1
+        AND t1 t0
+        OR t1 MASK
+loop:   BEQ t0 t1 done
+        DEC t1
+        BSM t0 t1 loop
+        NOT t0
+        MOD t0 511
+        JMP loop
+done:   ADD t0 t1
+        HLT
@@ -0,0 +1,105 @@
+"""
+Execution of a program in a background thread
+
+The worker runs the program in quiet mode by chunks of instructions (instruction limit of execute_program) and
+checks between two chunks if it was asked to pause or stop, so the thread which started it (the GUI) stays free and
+only reads the progress counters. The architecture must not be changed by another thread while the worker runs.
+"""
+import threading
+import time
+
+from execution import HALT_INSTRUCTION_LIMIT
+
+CHUNK_SIZE = 10_000  # Instructions executed between two checks of pause and stop
+
+# States of a worker
+RUNNING = "running"
+PAUSED = "paused"
+DONE = "done"
+
+
+class SimulationWorker:
+    def __init__(self, architecture, engine="interpreter", chunk_size=CHUNK_SIZE, breakpoints=None):
+        """
+        :param architecture: Architecture with the program loaded
+        :param engine: Engine of the quiet execution (interpreter or block)
+        :param chunk_size: Instructions executed between two checks of pause and stop
+        :param breakpoints: Breakpoints stopping the execution (see breakpoints.py), None for none
+        """
+        self.architecture = architecture
+        self.engine = engine
+        self.breakpoints = breakpoints
+        self.chunk_size = chunk_size
+        self.state = RUNNING
+        self.instruction_count = 0
+        self.running_time = 0.0  # Seconds spent executing, pauses excluded
+        self.result = None  # ExecutionResult of the last chunk, None if stopped before the program halted
+        self.error = None  # Unexpected exception raised by the execution
+        self.stop_requested = False
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        """
+        Start the execution in the background thread
+        """
+        self.thread.start()
+
+    def run(self):
+        """
+        Body of the background thread
+        """
+        try:
+            while not self.stop_requested:
+                if not self.resume_event.is_set():
+                    self.state = PAUSED
+                    self.resume_event.wait()
+                    self.state = RUNNING
+                    continue
+
+                start = time.perf_counter()
+                result = self.architecture.execute_program("quiet", self.engine, max_instructions=self.chunk_size,
+                                                           breakpoints=self.breakpoints)
+                self.running_time += time.perf_counter() - start
+                self.instruction_count += result.instruction_count
+                if result.halt_reason != HALT_INSTRUCTION_LIMIT:
+                    result.instruction_count = self.instruction_count
+                    self.result = result
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            self.state = DONE
+
+    def pause(self):
+        """
+        Pause after the current chunk
+        """
+        self.resume_event.clear()
+
+    def resume(self):
+        """
+        Resume after a pause
+        """
+        self.resume_event.set()
+
+    def stop(self):
+        """
+        Stop after the current chunk, the architecture keeps the state reached
+        """
+        self.stop_requested = True
+        self.resume_event.set()
+
+    def join(self, timeout=None):
+        """
+        Wait for the background thread to end
+        :param timeout: Maximum wait in seconds, None to wait until it ends
+        """
+        self.thread.join(timeout)
+
+    def instructions_per_second(self):
+        """
+        :return: Average instructions per second while running
+        """
+        return self.instruction_count / self.running_time if self.running_time else 0.0
@@ -0,0 +1,60 @@
+"""
+Snapshots of the machine state (registers, memory, variables, stack and program counter)
+
+The memory is stored as pages of PAGE_SIZE words (immutable bytes). A snapshot reuses the page objects of the previous
+snapshot of the same Architecture when they did not change, so many snapshots of a mostly unchanged memory share their
+pages, and restoring a snapshot only writes back the pages which differ from the current memory.
+The program itself (memory_code) is not part of a snapshot: a snapshot is restored on the program it was taken from.
+"""
+import copy
+
+PAGE_SIZE = 64  # Words per memory page (8 pages of the 512-word memory)
+PAGE_BYTES = 2 * PAGE_SIZE  # The memory words are 16-bit array items
+
+
+class Snapshot:
+    __slots__ = ('pages', 'registers', 'stack', 'program_counter', 'variable_positions', 'allocator')
+
+    def __init__(self, architecture, previous=None):
+        """
+        :param architecture: Architecture to take the state from
+        :param previous: Snapshot of the same Architecture whose unchanged pages are shared, None if there is none
+        """
+        data = architecture.memory_words.tobytes()
+        pages = [data[start:start + PAGE_BYTES] for start in range(0, len(data), PAGE_BYTES)]
+        if previous is not None:
+            pages = [old if old == page else page for old, page in zip(previous.pages, pages)]
+        self.pages = tuple(pages)
+        self.registers = tuple(architecture.register_words)
+        self.stack = tuple(architecture.stack_words)
+        self.program_counter = architecture.program_counter
+        self.variable_positions = dict(architecture.variable_positions)
+        self.allocator = copy.copy(architecture.allocator)
+
+    def restore(self, architecture):
+        """
+        Put the state back into an Architecture, in place (the memory, registers and stack objects are kept)
+        The binding generation only changes if the variables differ
+        :param architecture: Architecture to restore
+        """
+        with memoryview(architecture.memory_words).cast('B') as memory:
+            for index, page in enumerate(self.pages):
+                start = index * PAGE_BYTES
+                if memory[start:start + PAGE_BYTES] != page:
+                    memory[start:start + PAGE_BYTES] = page
+        architecture.register_words[:] = self.registers
+        architecture.stack_words[:] = self.stack
+        architecture.program_counter = self.program_counter
+        if architecture.variable_positions != self.variable_positions:
+            architecture.variable_positions = dict(self.variable_positions)
+            architecture.position_variables = {position: name for name, position in self.variable_positions.items()}
+            architecture.binding_generation += 1
+        architecture.allocator = copy.copy(self.allocator)
+
+    def shared_pages(self, other):
+        """
+        :param other: Another snapshot
+        :return: Number of memory pages shared with the other snapshot
+        """
+        return sum(page is other_page for page, other_page in zip(self.pages, other.pages))
+
@@ -0,0 +1,69 @@
+import unittest
+
+from assembler import assemble
+from instructions import decode_word
+from program_format import read_program
+
+
+def decode(source):
+    """
+    :param source: Mnemonic source
+    :return: List of the decoded instructions
+    """
+    return [decode_word(word) for word in assemble(source)]
+
+
+class LabelTest(unittest.TestCase):
+    def test_forward_and_backward_labels(self):
+        program = decode("#CODE\nLDA t0 0\nloop:\nBEQ t0 3 end\nINC t0\nJMP loop\nend:\nHLT\n")
+        # A taken branch goes to label + 1: the label field is the target minus 1
+        self.assertEqual((program[1].op_code, program[1].label), ("BEQ", 3))
+        self.assertEqual((program[3].op_code, program[3].label), ("JMP", 0))
+
+    def test_label_on_the_same_line(self):
+        program = decode("#CODE\nINC t0\nloop: INC t0\nJMP loop\n")
+        self.assertEqual(len(program), 3)
+        self.assertEqual(program[2].label, 0)
+
+    def test_undefined_label(self):
+        with self.assertRaisesRegex(ValueError, "Line 3: Label end is not defined"):
+            assemble("#CODE\nINC t0\nJMP end\nHLT\n")
+
+    def test_duplicate_label(self):
+        with self.assertRaisesRegex(ValueError, "Line 4: Label loop is already defined"):
+            assemble("#CODE\nINC t0\nloop: INC t0\nloop: HLT\n")
+
+    def test_label_out_of_range(self):
+        with self.assertRaisesRegex(ValueError, "Label start is out of range"):
+            assemble("#CODE\nstart: INC t0\nJMP start\n")
+
+
+class ConstantTest(unittest.TestCase):
+    def test_folded_expressions(self):
+        program = decode("#DATA\nSIZE = 4 * 8\nMASK = (1 << 4) - 1\nabc SIZE - 1\n#CODE\nLDA t0 MASK & ~3\n"
+                         "ADD t0 SIZE // 2 + 1\nHLT\n")
+        self.assertEqual((program[1].op_code, program[1].operand_2), ("STR", 31))
+        self.assertEqual((program[2].op_code, program[2].operand_2), ("LDA", 12))
+        self.assertEqual((program[3].op_code, program[3].operand_2), ("ADD", 17))
+
+    def test_out_of_range_constants(self):
+        for expression in ("512", "1 - 2", "1 << 9", "1 << 100"):
+            with self.subTest(expression=expression), self.assertRaisesRegex(ValueError, "does not fit in 9 bits"):
+                assemble(f"#CODE\nLDA t0 {expression}\n")
+        with self.assertRaisesRegex(ValueError, "Negative shift count"):
+            assemble("#CODE\nLDA t0 1 >> -1\n")
+
+    def test_invalid_expressions(self):
+        with self.assertRaisesRegex(ValueError, "Unknown constant SIZE"):
+            assemble("#CODE\nLDA t0 SIZE + 1\n")
+        with self.assertRaisesRegex(ValueError, "Invalid constant expression"):
+            assemble("#CODE\nLDA t0 8 / 2\n")
+
+
+class SampleTest(unittest.TestCase):
+    def test_source_matches_the_text_program(self):
+        self.assertEqual(list(read_program("sample_4.asm")), list(read_program("sample_4.txt")))
+
+
+if __name__ == "__main__":
+    unittest.main()
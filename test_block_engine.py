@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+
+from Assembly import Architecture
+from instructions import OP_CODES_BY_VALUE
+from program_format import EXTENSION, write_packed
+
+OP_CODE_VALUES = {op_code: value for value, op_code in OP_CODES_BY_VALUE.items()}
+
+
+class MappedProgramTest(unittest.TestCase):
+    def test_invalid_op_code_found_during_translation(self):
+        # INC t0, an unused op code, HLT: the invalid instruction is only decoded when its block is translated
+        words = [OP_CODE_VALUES["INC"] << 27, 0b10010 << 27, OP_CODE_VALUES["HLT"] << 27]
+        with tempfile.NamedTemporaryFile(suffix=EXTENSION, delete=False) as f:
+            pass
+        try:
+            write_packed(f.name, words)
+            results = []
+            for engine in ("interpreter", "block"):
+                architecture = Architecture()
+                architecture.fetch_data(f.name, mapped=True)
+                results.append(architecture.execute_program("quiet", engine).to_dict())
+                architecture.close_program()
+        finally:
+            os.remove(f.name)
+        self.assertEqual(results[1], results[0])
+        self.assertEqual((results[1]['halt_reason'], results[1]['instruction_count'], results[1]['program_counter']),
+                         ("ERROR", 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from Assembly import Architecture
+from breakpoints import Breakpoints
+from execution import HALT_BREAKPOINT, HALT_WATCHPOINT
+
+
+def load(source):
+    """
+    :param source: Mnemonic source of the program
+    :return: Architecture with the program loaded
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.asm', delete=False) as f:
+        f.write(source)
+    try:
+        architecture = Architecture()
+        architecture.fetch_data(f.name)
+    finally:
+        os.remove(f.name)
+    return architecture
+
+
+class BreakpointTest(unittest.TestCase):
+    def test_breakpoint_and_condition_on_the_same_program_counter(self):
+        architecture = load("#CODE\nINC t0\nINC t0\nHLT\n")
+        breakpoints = Breakpoints()
+        breakpoints.add_breakpoint(1)
+        breakpoints.add_breakpoint(1, ('t0', 7))
+
+        result = architecture.execute_program("quiet", breakpoints=breakpoints)
+        self.assertEqual(result.halt_reason, HALT_BREAKPOINT)
+        self.assertEqual(architecture.program_counter, 1)
+        self.assertEqual(breakpoints.hit, "Breakpoint at PC 1")
+
+
+class WatchpointTest(unittest.TestCase):
+    def test_watch_variable_created_during_the_run(self):
+        architecture = load("#DATA\nabc 0\n#CODE\nSTR abc 5\nSTR abc 6\nHLT\n")
+        breakpoints = Breakpoints()
+        breakpoints.parse("watch abc")
+
+        result = architecture.execute_program("quiet", breakpoints=breakpoints)
+        self.assertEqual(result.halt_reason, HALT_WATCHPOINT)
+        self.assertEqual(breakpoints.hit, "Watchpoint: memory 0 changed from 0 to 5")
+
+        result = architecture.execute_program("quiet", breakpoints=breakpoints)
+        self.assertEqual(result.halt_reason, HALT_WATCHPOINT)
+        self.assertEqual(breakpoints.hit, "Watchpoint: memory 0 changed from 5 to 6")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from Assembly import Architecture
+from assembler import assemble
+from control_flow import ControlFlowGraph
+from instructions import decode_word
+from program_format import write_packed
+
+
+def graph(source):
+    """
+    :param source: Mnemonic source of the program
+    :return: ControlFlowGraph of the program
+    """
+    return ControlFlowGraph([decode_word(word) for word in assemble(source)])
+
+
+def load_words(words):
+    """
+    :param words: 32-bit instructions of the program
+    :return: Architecture with the program loaded
+    """
+    with tempfile.NamedTemporaryFile(suffix='.m7p', delete=False) as f:
+        pass
+    try:
+        write_packed(f.name, words)
+        architecture = Architecture()
+        architecture.fetch_data(f.name)
+    finally:
+        os.remove(f.name)
+    return architecture
+
+
+class ControlFlowTest(unittest.TestCase):
+    def test_loops_of_sample_program(self):
+        architecture = Architecture()
+        architecture.fetch_data("sample_4.txt")
+        control_flow = architecture.control_flow_graph()
+        self.assertIs(architecture.control_flow_graph(), control_flow)
+        self.assertEqual(control_flow.loops(), {10: [10, 11, 13]})
+        self.assertEqual(control_flow.unreachable_code(), [])
+
+    def test_nested_loops(self):
+        control_flow = graph("#CODE\nLDA t0 0\nouter:\nLDA t1 0\ninner:\nINC t1\nBNE t1 3 inner\nINC t0\n"
+                             "BNE t0 3 outer\nHLT\n")
+        self.assertEqual(control_flow.loops(), {1: [1, 2, 4], 2: [2]})
+
+    def test_unreachable_code(self):
+        control_flow = graph("#CODE\nJMP skip\nINC t0\nINC t0\nskip:\nINC t1\nHLT\nINC t2\nINC t3\n")
+        self.assertEqual(control_flow.unreachable_code(), [(1, 2), (5, 6)])
+        self.assertEqual(control_flow.loops(), {})
+
+    def test_branch_past_the_end_is_rejected(self):
+        words = assemble("#CODE\nJMP end\nINC t0\nINC t0\nend:\nHLT\n")  # JMP to instruction 3
+        architecture = load_words(words[:3])  # The target is the end of the program
+        self.assertEqual(architecture.execute_program("quiet").halt_reason, "END_OF_PROGRAM")
+        with self.assertRaises(ValueError) as context:
+            load_words(words[:2])
+        self.assertIn("instruction 0 jumps to 3", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from block_engine import BlockEngine
+from differential import compare_engines
+
+
+def write(source):
+    """
+    :param source: Mnemonic source of the program
+    :return: Path of a temporary .asm file with the program, to remove after use
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.asm', delete=False) as f:
+        f.write(source)
+    return f.name
+
+
+class DifferentialTest(unittest.TestCase):
+    def setUp(self):
+        # t0 counts to 20 in a loop, then t1 is incremented
+        self.file_path = write("#CODE\nLDA t0 0\nloop:\nINC t0\nBNE t0 20 loop\nINC t1\nINC t1\nHLT\n")
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def test_engines_match(self):
+        divergence, count = compare_engines(self.file_path, interval=7)
+        self.assertIsNone(divergence)
+        self.assertEqual(count, 44)
+
+    def test_injected_divergence(self):
+        translate_instruction = BlockEngine.translate_instruction
+
+        def faulty_translate_instruction(engine, instruction, program_counter, constants):
+            # The block engine increments t1 twice on the last INC
+            lines = translate_instruction(engine, instruction, program_counter, constants)
+            if program_counter == 4:
+                lines = lines + [f"registers[{instruction.operand_1}] += 1"]
+            return lines
+
+        BlockEngine.translate_instruction = faulty_translate_instruction
+        try:
+            divergence, count = compare_engines(self.file_path, interval=7)
+        finally:
+            BlockEngine.translate_instruction = translate_instruction
+        self.assertIsNotNone(divergence)
+        # Found at the end of the translated block (INC t1, HLT) of the last chunk
+        self.assertEqual(divergence.instruction_count, 44)
+        self.assertEqual(divergence.program_counter, 5)
+        self.assertEqual(divergence.differences, {'registers': ({'t0': 20, 't1': 2, 't2': 0, 't3': 0},
+                                                                {'t0': 20, 't1': 3, 't2': 0, 't3': 0})})
+        self.assertEqual(count, 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from Assembly import Architecture
+from snapshot import PAGE_SIZE
+
+
+def load(source):
+    """
+    :param source: Mnemonic source of the program
+    :return: Architecture with the program loaded
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.asm', delete=False) as f:
+        f.write(source)
+    try:
+        architecture = Architecture()
+        architecture.fetch_data(f.name)
+    finally:
+        os.remove(f.name)
+    return architecture
+
+
+def state(architecture):
+    """
+    :param architecture: Architecture
+    :return: Copy of the registers, memory, stack, program counter and variables
+    """
+    return (list(architecture.register_words), architecture.memory_words.tolist(), list(architecture.stack_words),
+            architecture.program_counter, dict(architecture.variable_positions))
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        # VAD abc, STR abc 1, then the code
+        self.architecture = load("#DATA\nabc 1\n#CODE\nSTR abc 7\nPUSH abc\nINC t0\nVDE abc\nHLT\n")
+
+    def test_restore(self):
+        architecture = self.architecture
+        architecture.execute_program("quiet", max_instructions=3)
+        snapshot = architecture.take_snapshot()
+        before = state(architecture)
+        result = architecture.execute_program("quiet")
+        after = state(architecture)
+        self.assertNotEqual(after, before)
+
+        architecture.restore_snapshot(snapshot)
+        self.assertEqual(state(architecture), before)
+        self.assertEqual(architecture.execute_program("quiet").to_dict(), result.to_dict())
+        self.assertEqual(state(architecture), after)
+
+    def test_restore_rebinds_the_variables(self):
+        architecture = self.architecture
+        architecture.execute_program("quiet", max_instructions=2)
+        snapshot = architecture.take_snapshot()
+        architecture.execute_program("quiet")
+        self.assertNotIn('abc', architecture.variable_positions)
+
+        generation = architecture.binding_generation
+        architecture.restore_snapshot(snapshot)
+        self.assertEqual(architecture.variable_positions, {'abc': 0})
+        self.assertEqual(architecture.position_variables, {0: 'abc'})
+        self.assertGreater(architecture.binding_generation, generation)
+        self.assertEqual(architecture.execute_program("quiet").halt_reason, "HLT")
+
+    def test_unchanged_pages_are_shared(self):
+        architecture = self.architecture
+        first = architecture.take_snapshot()
+        architecture.execute_program("quiet", max_instructions=3)  # Only writes memory position 0
+        second = architecture.take_snapshot()
+        pages = len(first.pages)
+        self.assertEqual(pages * PAGE_SIZE, len(architecture.memory_words))
+        self.assertEqual(second.shared_pages(first), pages - 1)
+        self.assertIsNot(second.pages[0], first.pages[0])
+
+        third = architecture.take_snapshot()
+        self.assertEqual(third.shared_pages(second), pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
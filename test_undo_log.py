@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from Assembly import Architecture
+from execution import (CHANGE_BIND, CHANGE_MEMORY, CHANGE_PC, CHANGE_POP, CHANGE_PUSH, CHANGE_REGISTER,
+                       CHANGE_UNBIND, HALT_HLT)
+
+
+def load(source):
+    """
+    :param source: Mnemonic source of the program
+    :return: Architecture with the program loaded
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.asm', delete=False) as f:
+        f.write(source)
+    try:
+        architecture = Architecture()
+        architecture.fetch_data(f.name)
+    finally:
+        os.remove(f.name)
+    return architecture
+
+
+def state(architecture):
+    """
+    :param architecture: Architecture
+    :return: Copy of the registers, memory, stack, program counter and variables
+    """
+    return (list(architecture.register_words), architecture.memory_words.tolist(), list(architecture.stack_words),
+            architecture.program_counter, dict(architecture.variable_positions),
+            dict(architecture.position_variables))
+
+
+class StepBackTest(unittest.TestCase):
+    def test_step_back_to_the_initial_state(self):
+        # VAD abc, STR abc 3, VAD xyz, STR xyz 4, then the code
+        architecture = load("#DATA\nabc 3\nxyz 4\n#CODE\nLDA t0 abc\nINC t1\nSTR abc t1\nPUSH t0\nPUSH abc\n"
+                            "POP t2\nVDE xyz\nHLT\n")
+        initial = state(architecture)
+        undo_log = architecture.enable_undo_log()
+
+        result = architecture.execute_program("quiet")
+        self.assertEqual(result.halt_reason, HALT_HLT)
+        self.assertEqual(len(undo_log), result.instruction_count)
+        kinds = {change.kind for entry in undo_log.entries for change in entry}
+        self.assertEqual(kinds, {CHANGE_REGISTER, CHANGE_MEMORY, CHANGE_PUSH, CHANGE_POP, CHANGE_BIND, CHANGE_UNBIND,
+                                 CHANGE_PC})
+        self.assertNotEqual(state(architecture), initial)
+
+        for _ in range(result.instruction_count):
+            self.assertTrue(architecture.step_back())
+        self.assertFalse(architecture.step_back())
+        self.assertEqual(state(architecture), initial)
+
+        # The freed positions are allocated again the same way
+        self.assertEqual(architecture.execute_program("quiet").to_dict(), result.to_dict())
+
+    def test_step_back_one_instruction(self):
+        architecture = load("#CODE\nINC t0\nPUSH t0\nHLT\n")
+        architecture.enable_undo_log()
+        architecture.execute_program("quiet", max_instructions=2)
+        self.assertEqual(architecture.stack_words, [1])
+
+        self.assertTrue(architecture.step_back())
+        self.assertEqual((architecture.program_counter, architecture.stack_words, architecture.register_words[0]),
+                         (1, [], 1))
+
+    def test_undo_log_size(self):
+        architecture = load("#CODE\nINC t0\nINC t0\nINC t0\nHLT\n")
+        architecture.enable_undo_log(2)
+        architecture.execute_program("quiet")
+        self.assertTrue(architecture.step_back())
+        self.assertTrue(architecture.step_back())
+        self.assertFalse(architecture.step_back())
+        self.assertEqual((architecture.program_counter, architecture.register_words[0]), (2, 2))
+
+    def test_step_back_without_undo_log(self):
+        architecture = load("#CODE\nHLT\n")
+        with self.assertRaises(ValueError):
+            architecture.step_back()
+
+
+if __name__ == "__main__":
+    unittest.main()
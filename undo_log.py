@@ -0,0 +1,70 @@
+"""
+Undo log of the executed instructions (reverse execution)
+
+Each executed instruction is recorded as the StateChange list found by Architecture.execute_observed (registers,
+memory positions, stack push or pop and variable bindings that changed) followed by the program counter change, not as
+a copy of the state. The log is a ring buffer: only the last size instructions can be undone.
+"""
+from collections import deque
+
+from execution import (CHANGE_BIND, CHANGE_MEMORY, CHANGE_PC, CHANGE_POP, CHANGE_PUSH, CHANGE_REGISTER,
+                       CHANGE_UNBIND, StateChange)
+
+UNDO_LOG_SIZE = 10_000  # Default number of instructions which can be undone
+INVERSE_KINDS = {CHANGE_PUSH: CHANGE_POP, CHANGE_POP: CHANGE_PUSH, CHANGE_BIND: CHANGE_UNBIND,
+                 CHANGE_UNBIND: CHANGE_BIND}
+
+
+class UndoLog:
+    def __init__(self, size=UNDO_LOG_SIZE):
+        """
+        :param size: Number of instructions kept, the oldest are dropped
+        """
+        self.size = size
+        self.entries = deque(maxlen=size)  # Tuple of the StateChange of each instruction, the last executed at the end
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def record(self, changes):
+        """
+        :param changes: StateChange list of an executed instruction, with its program counter change
+        """
+        self.entries.append(tuple(changes))
+
+    def undo(self, architecture):
+        """
+        Undo the changes of the last recorded instruction
+        :param architecture: Architecture which executed it
+        :return: List of the StateChange made by undoing it, None if the log is empty
+        """
+        if not self.entries:
+            return None
+        inverse = []
+        for change in reversed(self.entries.pop()):
+            kind, location = change.kind, change.location
+            if kind == CHANGE_REGISTER:
+                architecture.register_words[location] = change.old
+            elif kind == CHANGE_MEMORY:
+                architecture.memory_words[location] = change.old
+            elif kind == CHANGE_PUSH:
+                architecture.stack_words.pop()
+            elif kind == CHANGE_POP:
+                architecture.stack_words.append(change.old)
+            elif kind == CHANGE_BIND:
+                del architecture.variable_positions[change.new]
+                del architecture.position_variables[location]
+                architecture.allocator.release(location)
+                architecture.binding_generation += 1
+            elif kind == CHANGE_UNBIND:
+                architecture.allocator.claim(location)
+                architecture.variable_positions[change.old] = location
+                architecture.position_variables[location] = change.old
+                architecture.binding_generation += 1
+            elif kind == CHANGE_PC:
+                architecture.program_counter = change.old
+            inverse.append(StateChange(INVERSE_KINDS.get(kind, kind), location, change.new, change.old))
+        return inverse